@@ -0,0 +1,176 @@
+"""
+Automatic segment proposals: silence detection on the decoded PCM and scene
+change detection on downsampled frames. Both stream over a memory-mapped
+decode in fixed-size chunks, so memory stays flat however long the source.
+"""
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+import numpy as np
+from .ffmpeg_runner import FFmpegError, FFmpegRunner
+from .logger import get_logger
+from .paths import get_cache_dir
+from .pcm_cache import CHANNELS, SAMPLE_RATE, PcmCache
+
+logger = get_logger(__name__)
+
+# Loudness is measured per window of this length
+SILENCE_WINDOW_MS = 50
+SILENCE_THRESHOLD_DB = -40.0
+MIN_SILENCE_MS = 700
+# Proposed segments keep this much of the silence around them, so words aren't clipped
+SILENCE_PADDING_MS = 150
+MIN_SEGMENT_MS = 1000
+
+# Frames are compared as tiny grayscale images sampled at this rate
+SCENE_FPS = 4
+SCENE_WIDTH = 64
+SCENE_HEIGHT = 36
+# Mean absolute difference between consecutive frames, on a 0-255 scale
+SCENE_THRESHOLD = 30.0
+MIN_SCENE_MS = 2000
+
+# Windows or frames processed per step
+CHUNK_WINDOWS = 1024
+CHUNK_FRAMES = 4096
+
+
+def window_levels_db(samples: np.ndarray, window: int) -> np.ndarray:
+    """
+    RMS level in dBFS of each run of window 16-bit samples; for interleaved
+    audio pass window * channels. A shorter last window is measured as is.
+    """
+    whole = len(samples) // window * window
+    step = window * CHUNK_WINDOWS
+    power = []
+    for offset in range(0, whole, step):
+        chunk = np.asarray(samples[offset:min(offset + step, whole)], dtype=np.float32).reshape(-1, window)
+        # einsum sums the squares without a temporary array the size of the chunk
+        power.append(np.einsum("ij,ij->i", chunk, chunk) / window)
+    if whole < len(samples):
+        tail = np.asarray(samples[whole:], dtype=np.float32)
+        power.append(np.array([np.dot(tail, tail) / len(tail)], dtype=np.float32))
+    if not power:
+        return np.zeros(0, dtype=np.float32)
+    return 10 * np.log10(np.concatenate(power) / 32768.0 ** 2 + 1e-12)
+
+
+def runs(mask: np.ndarray, min_length: int = 1) -> list[tuple[int, int]]:
+    """[start, end) index ranges where mask is True for at least min_length items."""
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    keep = ends - starts >= min_length
+    return list(zip(starts[keep].tolist(), ends[keep].tolist()))
+
+
+def spans_between(
+    cuts: list[tuple[int, int]],
+    duration_ms: int,
+    padding_ms: int = 0,
+    min_length_ms: int = MIN_SEGMENT_MS
+) -> list[tuple[int, int]]:
+    """The stretches of [0, duration_ms) outside cuts, grown by padding_ms into each cut."""
+    spans = []
+    position = 0
+    for cut_start, cut_end in cuts + [(duration_ms, duration_ms)]:
+        start = max(position - padding_ms, 0)
+        end = min(cut_start + padding_ms, duration_ms)
+        if end - start >= min_length_ms:
+            spans.append((start, end))
+        position = cut_end
+    return spans
+
+
+def scene_cut_frames(frames: np.ndarray, threshold: float = SCENE_THRESHOLD) -> list[int]:
+    """Indices of frames that differ from the one before by more than threshold."""
+    cuts = []
+    previous = None
+    for offset in range(0, len(frames), CHUNK_FRAMES):
+        chunk = np.asarray(frames[offset:offset + CHUNK_FRAMES], dtype=np.int16)
+        if previous is not None:
+            chunk = np.concatenate([previous, chunk])
+        # diffs[i] compares frame i + 1 of chunk with frame i
+        diffs = np.abs(np.diff(chunk, axis=0)).mean(axis=1)
+        first = offset if previous is not None else offset + 1
+        cuts.extend((first + np.flatnonzero(diffs > threshold)).tolist())
+        previous = chunk[-1:]
+    return cuts
+
+
+class MediaAnalyzer:
+    def __init__(self, ffmpeg_path: str, pcm_cache: PcmCache, runner: Optional[FFmpegRunner] = None):
+        self.ffmpeg_path = ffmpeg_path
+        self.pcm_cache = pcm_cache
+        self.runner = runner or FFmpegRunner()
+    
+    def silences(
+        self,
+        source: Path,
+        threshold_db: float = SILENCE_THRESHOLD_DB,
+        min_silence_ms: int = MIN_SILENCE_MS,
+        cancel: Optional[threading.Event] = None
+    ) -> tuple[list[tuple[int, int]], int]:
+        """(start_ms, end_ms) of each silence, and the audio's duration in ms."""
+        pcm_path = self.pcm_cache.decode(source, cancel=cancel)
+        window = SAMPLE_RATE * SILENCE_WINDOW_MS // 1000
+        if pcm_path.stat().st_size < 2 * CHANNELS:
+            return [], 0
+        samples = np.memmap(pcm_path, dtype="<i2", mode="r")
+        duration_ms = len(samples) // CHANNELS * 1000 // SAMPLE_RATE
+        levels = window_levels_db(samples, window * CHANNELS)
+        del samples
+        silent = runs(levels < threshold_db, max(1, min_silence_ms // SILENCE_WINDOW_MS))
+        silences = [
+            (start * SILENCE_WINDOW_MS, min(end * SILENCE_WINDOW_MS, duration_ms))
+            for start, end in silent
+        ]
+        logger.info(f"Found {len(silences)} silences in {source.name}")
+        return silences, duration_ms
+    
+    def sound_segments(self, source: Path, cancel: Optional[threading.Event] = None) -> list[tuple[int, int]]:
+        """Propose one segment per stretch of sound between silences."""
+        silences, duration_ms = self.silences(source, cancel=cancel)
+        return spans_between(silences, duration_ms, SILENCE_PADDING_MS)
+    
+    def scene_cuts(
+        self,
+        source: Path,
+        threshold: float = SCENE_THRESHOLD,
+        min_scene_ms: int = MIN_SCENE_MS,
+        cancel: Optional[threading.Event] = None
+    ) -> tuple[list[int], int]:
+        """Times in ms where a new scene starts, and the video's duration in ms."""
+        frame_bytes = SCENE_WIDTH * SCENE_HEIGHT
+        with tempfile.TemporaryDirectory(prefix="scenes-", dir=get_cache_dir()) as tmp:
+            raw = Path(tmp) / "frames.gray"
+            cmd = [
+                self.ffmpeg_path, "-y", "-i", str(source),
+                "-map", "0:v:0", "-an", "-sn",
+                "-vf", f"fps={SCENE_FPS},scale={SCENE_WIDTH}:{SCENE_HEIGHT},format=gray",
+                "-f", "rawvideo", str(raw)
+            ]
+            try:
+                self.runner.run(cmd, cancel=cancel, outputs=[raw])
+            except FFmpegError as e:
+                raise RuntimeError(f"Scene detection failed: {e}\n{e.stderr}") from e
+            count = raw.stat().st_size // frame_bytes
+            if count < 2:
+                return [], count * 1000 // SCENE_FPS
+            frames = np.memmap(raw, dtype=np.uint8, mode="r", shape=(count, frame_bytes))
+            candidates = scene_cut_frames(frames, threshold)
+            del frames
+        
+        cuts = []
+        for frame in candidates:
+            time_ms = frame * 1000 // SCENE_FPS
+            if time_ms - (cuts[-1] if cuts else 0) >= min_scene_ms:
+                cuts.append(time_ms)
+        logger.info(f"Found {len(cuts)} scene changes in {source.name}")
+        return cuts, count * 1000 // SCENE_FPS
+    
+    def scene_segments(self, source: Path, cancel: Optional[threading.Event] = None) -> list[tuple[int, int]]:
+        """Propose one segment per scene."""
+        cuts, duration_ms = self.scene_cuts(source, cancel=cancel)
+        return spans_between([(cut, cut) for cut in cuts], duration_ms)
@@ -0,0 +1,167 @@
+"""Global bandwidth and connection budget shared by all active downloads."""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_CONNECTIONS = 16
+DEFAULT_FRAGMENTS_PER_JOB = 4
+
+# A lease that hasn't reported bytes for this long gives its share back to the others
+IDLE_AFTER_SECONDS = 2.0
+# How far ahead of its budget a lease may run before it is made to sleep
+BURST_SECONDS = 0.5
+RATE_SAMPLE_SECONDS = 0.5
+# How often a lease waiting for a free connection checks its cancel event
+ACQUIRE_POLL_SECONDS = 0.2
+
+
+@dataclass
+class SiteStats:
+    site: str
+    bytes: int = 0
+    busy_seconds: float = 0.0
+    jobs: int = 0
+    
+    @property
+    def rate(self) -> float:
+        return self.bytes / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+
+class BandwidthLease:
+    """
+    One job's slice of the global budget.
+    
+    consume() is called from yt-dlp progress hooks, which run on the threads
+    doing the actual reads, so sleeping there throttles the transfer itself.
+    """
+    
+    def __init__(self, scheduler: "BandwidthScheduler", key: str, site: str, priority: int, fragments: int):
+        self.scheduler = scheduler
+        self.key = key
+        self.site = site
+        self.priority = max(1, priority)
+        self.fragments = fragments
+        self.started_at = time.monotonic()
+        self.total_bytes = 0
+        self.rate = 0.0
+        self._last_active = 0.0
+        self._budget_until = 0.0
+        self._sample_time = self.started_at
+        self._sample_bytes = 0
+        self._lock = threading.Lock()
+    
+    def consume(self, nbytes: int):
+        if nbytes <= 0:
+            return
+        now = time.monotonic()
+        share = self.scheduler._share(self, now)
+        with self._lock:
+            self.total_bytes += nbytes
+            self._last_active = now
+            elapsed = now - self._sample_time
+            if elapsed >= RATE_SAMPLE_SECONDS:
+                sample = (self.total_bytes - self._sample_bytes) / elapsed
+                self.rate = sample if self.rate == 0 else 0.7 * self.rate + 0.3 * sample
+                self._sample_time, self._sample_bytes = now, self.total_bytes
+            delay = 0.0
+            if share:
+                self._budget_until = max(self._budget_until, now) + nbytes / share
+                delay = self._budget_until - now - BURST_SECONDS
+        if delay > 0:
+            time.sleep(delay)
+    
+    def release(self):
+        self.scheduler.release(self)
+
+
+class BandwidthScheduler:
+    """
+    Splits max_rate (bytes/s, None for unlimited) between active leases in
+    proportion to their priority, and hands out at most max_connections
+    concurrent fragment fetches across all jobs. Once every connection is
+    leased, acquire() waits for a release.
+    """
+    
+    def __init__(self, max_rate: Optional[float] = None, max_connections: int = DEFAULT_MAX_CONNECTIONS):
+        self.max_rate = max_rate
+        self.max_connections = max(1, max_connections)
+        self._leases: list[BandwidthLease] = []
+        self._sites: dict[str, SiteStats] = {}
+        self._lock = threading.Lock()
+        self._freed = threading.Condition(self._lock)
+    
+    def set_limits(self, max_rate: Optional[float], max_connections: Optional[int] = None):
+        with self._lock:
+            self.max_rate = max_rate
+            if max_connections:
+                self.max_connections = max(1, max_connections)
+            self._freed.notify_all()
+        logger.info(f"Bandwidth limits: rate={max_rate or 'unlimited'}, connections={self.max_connections}")
+    
+    def acquire(
+        self,
+        key: str,
+        site: str = "",
+        priority: int = 1,
+        fragments: int = DEFAULT_FRAGMENTS_PER_JOB,
+        cancel: Optional[threading.Event] = None
+    ) -> Optional[BandwidthLease]:
+        """
+        Lease up to fragments connections, waiting until at least one is
+        free. Returns None if cancel is set while waiting.
+        """
+        with self._freed:
+            while (free := self.max_connections - self._in_use()) < 1:
+                if cancel and cancel.is_set():
+                    logger.debug(f"Bandwidth lease for {key} cancelled while waiting")
+                    return None
+                self._freed.wait(ACQUIRE_POLL_SECONDS)
+            granted = min(max(1, fragments), free)
+            lease = BandwidthLease(self, key, site, priority, granted)
+            self._leases.append(lease)
+        logger.debug(f"Bandwidth lease for {key}: site={site}, priority={priority}, fragments={granted}/{fragments}")
+        return lease
+    
+    def release(self, lease: BandwidthLease):
+        with self._lock:
+            if lease not in self._leases:
+                return
+            self._leases.remove(lease)
+            self._freed.notify_all()
+            stats = self._sites.setdefault(lease.site, SiteStats(lease.site))
+            stats.bytes += lease.total_bytes
+            stats.busy_seconds += time.monotonic() - lease.started_at
+            stats.jobs += 1
+        logger.info(
+            f"Site {lease.site or 'unknown'}: {stats.jobs} jobs, "
+            f"average {stats.rate / 1024 / 1024:.2f} MB/s"
+        )
+    
+    def stats(self) -> list[SiteStats]:
+        """Per-site throughput of finished jobs, for tuning fragments and limits per site."""
+        with self._lock:
+            return [SiteStats(s.site, s.bytes, s.busy_seconds, s.jobs) for s in self._sites.values()]
+    
+    def total_rate(self) -> float:
+        with self._lock:
+            return sum(lease.rate for lease in self._leases)
+    
+    def _in_use(self) -> int:
+        return sum(lease.fragments for lease in self._leases)
+    
+    def _share(self, lease: BandwidthLease, now: float) -> Optional[float]:
+        with self._lock:
+            if not self.max_rate:
+                return None
+            active = [
+                other for other in self._leases
+                if other is lease or now - other._last_active < IDLE_AFTER_SECONDS
+            ]
+            weights = sum(other.priority for other in active)
+            if lease not in active:
+                weights += lease.priority
+            return self.max_rate * lease.priority / weights
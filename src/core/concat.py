@@ -0,0 +1,112 @@
+"""Joins exported segments into one file, by stream copy when their streams allow it."""
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+from .ffmpeg_runner import FFmpegError, FFmpegProgress, FFmpegRunner
+from .logger import get_logger
+from .media_info import MediaProbeError, MediaProber
+
+logger = get_logger(__name__)
+
+
+class Concatenator:
+    def __init__(self, ffmpeg_path: str, prober: MediaProber, runner: Optional[FFmpegRunner] = None):
+        self.ffmpeg_path = ffmpeg_path
+        self.prober = prober
+        self.runner = runner or FFmpegRunner()
+    
+    def compatible(self, pieces: list[Path]) -> bool:
+        """
+        Whether the concat demuxer can copy pieces back to back: same streams
+        with the same codec parameters. Unprobeable pieces count as
+        compatible; a failed copy still falls back to re-encoding.
+        """
+        signatures = set()
+        for piece in pieces:
+            try:
+                info = self.prober.probe(piece)
+            except MediaProbeError as e:
+                logger.debug(f"Could not probe {piece.name} for joining: {e}")
+                continue
+            signatures.add(tuple(
+                (s.codec_type, s.codec_name, s.profile, s.width, s.height, s.pix_fmt, s.sample_rate, s.channels)
+                for s in info.streams
+            ))
+        return len(signatures) <= 1
+    
+    def join(
+        self,
+        pieces: list[Path],
+        output: Path,
+        audio_only: bool = False,
+        with_audio: bool = True,
+        threads: Optional[int] = None,
+        progress_callback: Optional[Callable[[FFmpegProgress], None]] = None,
+        cancel: Optional[threading.Event] = None
+    ) -> Path:
+        """
+        Write pieces, in order, to output. Stream copy when they are
+        compatible, otherwise (or if the copy fails) a re-encode through the
+        concat filter, with the same codecs as the segment exports.
+        """
+        output.parent.mkdir(parents=True, exist_ok=True)
+        if self.compatible(pieces):
+            try:
+                return self._copy(pieces, output, audio_only, progress_callback, cancel)
+            except FFmpegError as e:
+                logger.warning(f"Stream-copy join failed, re-encoding: {e}\n{e.stderr}")
+        else:
+            logger.info(f"Segments have different stream parameters, re-encoding {output.name}")
+        
+        video = not audio_only
+        audio = audio_only or with_audio
+        cmd = [self.ffmpeg_path, "-y"]
+        inputs = ""
+        for n, piece in enumerate(pieces):
+            cmd += ["-i", str(piece)]
+            inputs += f"[{n}:v:0]" * video + f"[{n}:a:0]" * audio
+        graph = f"{inputs}concat=n={len(pieces)}:v={int(video)}:a={int(audio)}" + "[v]" * video + "[a]" * audio
+        cmd += ["-filter_complex", graph]
+        if video:
+            cmd += ["-map", "[v]", "-c:v", "libx264", "-preset", "fast"]
+        if audio:
+            cmd += ["-map", "[a]"]
+            cmd += ["-acodec", "pcm_s16le", "-ar", "44100", "-ac", "2"] if audio_only else ["-c:a", "aac"]
+        if threads:
+            cmd += ["-threads", str(threads)]
+        cmd.append(str(output))
+        try:
+            self.runner.run(cmd, progress_callback, cancel, outputs=[output])
+        except FFmpegError as e:
+            logger.error(f"FFmpeg error: {e.stderr}")
+            raise RuntimeError(f"Joining segments failed: {e}\n{e.stderr}") from e
+        return output
+    
+    def _copy(
+        self,
+        pieces: list[Path],
+        output: Path,
+        audio_only: bool,
+        progress_callback: Optional[Callable[[FFmpegProgress], None]],
+        cancel: Optional[threading.Event]
+    ) -> Path:
+        with tempfile.TemporaryDirectory(prefix="join-", dir=output.parent) as tmp:
+            concat_list = Path(tmp) / "pieces.txt"
+            concat_list.write_text(
+                "".join(f"file '{self._concat_escape(piece)}'\n" for piece in pieces), encoding="utf-8"
+            )
+            cmd = [
+                self.ffmpeg_path, "-y",
+                "-f", "concat", "-safe", "0", "-i", str(concat_list),
+                "-map", "0", "-c", "copy",
+            ]
+            if not audio_only:
+                cmd += ["-movflags", "+faststart"]
+            cmd.append(str(output))
+            self.runner.run(cmd, progress_callback, cancel, outputs=[output])
+        logger.info(f"Joined {len(pieces)} segments by stream copy: {output}")
+        return output
+    
+    def _concat_escape(self, path: Path) -> str:
+        return str(path.resolve()).replace("'", "'\\''")
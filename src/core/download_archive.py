@@ -0,0 +1,119 @@
+"""Persistent index of finished downloads, used to skip repeat fetches."""
+import hashlib
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+from .logger import get_logger
+from .paths import get_app_data_dir
+from .store import SqliteStore
+from .urls import canonical_video_id
+
+logger = get_logger(__name__)
+
+# Bytes hashed from each end of the file; enough to catch truncation or a
+# different file at the same path without reading multi-GB downloads
+CHECKSUM_SAMPLE_BYTES = 1024 * 1024
+
+
+def quick_checksum(path: Path) -> str:
+    size = path.stat().st_size
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, "rb") as f:
+        digest.update(f.read(CHECKSUM_SAMPLE_BYTES))
+        if size > 2 * CHECKSUM_SAMPLE_BYTES:
+            f.seek(-CHECKSUM_SAMPLE_BYTES, 2)
+            digest.update(f.read(CHECKSUM_SAMPLE_BYTES))
+    return digest.hexdigest()
+
+
+@dataclass
+class ArchiveEntry:
+    video_id: str
+    format: str
+    format_id: str
+    path: Path
+    size: int
+    checksum: str
+    downloaded_at: float
+
+
+class DownloadArchive(SqliteStore):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS downloads (
+            video_id TEXT NOT NULL,
+            format TEXT NOT NULL,
+            format_id TEXT NOT NULL,
+            path TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            checksum TEXT NOT NULL,
+            downloaded_at REAL NOT NULL,
+            PRIMARY KEY (video_id, format)
+        );
+        CREATE TABLE IF NOT EXISTS aliases (
+            url TEXT PRIMARY KEY,
+            video_id TEXT NOT NULL
+        );
+    """
+    
+    def __init__(self, path: Optional[Path] = None):
+        super().__init__(path or get_app_data_dir() / "downloads.db")
+    
+    def resolve(self, url: str) -> Optional[str]:
+        """Map a URL to its video ID without touching the network."""
+        video_id = canonical_video_id(url)
+        if video_id:
+            return video_id
+        rows = self._query("SELECT video_id FROM aliases WHERE url = ?", (url.strip(),))
+        return rows[0]["video_id"] if rows else None
+    
+    def add_alias(self, url: str, video_id: str):
+        if canonical_video_id(url) is None:
+            self._execute(
+                "INSERT OR REPLACE INTO aliases (url, video_id) VALUES (?, ?)", (url.strip(), video_id)
+            )
+    
+    def get(self, video_id: str, fmt: str) -> Optional[ArchiveEntry]:
+        rows = self._query(
+            "SELECT * FROM downloads WHERE video_id = ? AND format = ?", (video_id, fmt)
+        )
+        if not rows:
+            return None
+        row = rows[0]
+        return ArchiveEntry(
+            video_id=row["video_id"], format=row["format"], format_id=row["format_id"],
+            path=Path(row["path"]), size=row["size"], checksum=row["checksum"],
+            downloaded_at=row["downloaded_at"],
+        )
+    
+    def lookup(self, video_id: str, fmt: str) -> Optional[Path]:
+        """Return the archived file if it is still on disk and unchanged; forget it otherwise."""
+        entry = self.get(video_id, fmt)
+        if not entry:
+            return None
+        try:
+            if entry.path.stat().st_size == entry.size and quick_checksum(entry.path) == entry.checksum:
+                return entry.path
+            logger.warning(f"Archived file changed on disk, will re-download: {entry.path}")
+        except OSError:
+            logger.info(f"Archived file no longer exists, will re-download: {entry.path}")
+        self.remove(video_id, fmt)
+        return None
+    
+    def record(self, video_id: str, fmt: str, format_id: str, path: Path) -> ArchiveEntry:
+        entry = ArchiveEntry(
+            video_id=video_id, format=fmt, format_id=format_id, path=path,
+            size=path.stat().st_size, checksum=quick_checksum(path), downloaded_at=time.time(),
+        )
+        self._execute(
+            "INSERT OR REPLACE INTO downloads "
+            "(video_id, format, format_id, path, size, checksum, downloaded_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (entry.video_id, entry.format, entry.format_id, str(entry.path),
+             entry.size, entry.checksum, entry.downloaded_at)
+        )
+        logger.debug(f"Archived {video_id} ({fmt}) -> {path}")
+        return entry
+    
+    def remove(self, video_id: str, fmt: str):
+        self._execute("DELETE FROM downloads WHERE video_id = ? AND format = ?", (video_id, fmt))
@@ -0,0 +1,280 @@
+"""Bounded worker pool for running many downloads at once."""
+import concurrent.futures
+import itertools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Callable, Optional, Union
+from urllib.parse import urlparse
+from .bandwidth import DEFAULT_FRAGMENTS_PER_JOB, BandwidthScheduler
+from .downloader import DownloadCancelled, Downloader, SectionDownload
+from .job_journal import JournalEntry
+from .logger import get_logger
+from .progress import Progress
+from .segment_store import Segment
+from .urls import cache_key
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_WORKERS = 3
+# How long shutdown waits for running downloads to notice they were cancelled
+SHUTDOWN_TIMEOUT_SECONDS = 5.0
+
+
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    FINISHED = "finished"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+@dataclass
+class DownloadJob:
+    id: int
+    url: str
+    priority: int = 1
+    audio_only: bool = False
+    # Only these time ranges are fetched (see Downloader.download_sections)
+    sections: list[Segment] = field(default_factory=list)
+    status: JobStatus = JobStatus.QUEUED
+    progress: float = 0.0
+    message: str = "Queued"
+    downloaded_bytes: int = 0
+    total_bytes: int = 0
+    speed: float = 0.0
+    eta: Optional[float] = None
+    submitted_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # The file, or one SectionDownload per range for a section job
+    result: Optional[Union[Path, list[SectionDownload]]] = None
+    error: Optional[str] = None
+    resume: Optional[JournalEntry] = None
+    # Checked by the downloader's progress hooks; set to stop the job while it runs
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in (JobStatus.FINISHED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+class DownloadQueue:
+    """
+    Runs submitted URLs through a shared Downloader on a fixed-size thread pool.
+
+    Listeners are called from worker threads; UI code must marshal them back
+    to its own thread (e.g. through a Qt signal).
+    """
+
+    def __init__(
+        self,
+        downloader: Downloader,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        on_update: Optional[Callable[[DownloadJob], None]] = None,
+        on_finished: Optional[Callable[[DownloadJob], None]] = None,
+        scheduler: Optional[BandwidthScheduler] = None,
+        fragments_per_job: int = DEFAULT_FRAGMENTS_PER_JOB
+    ):
+        self.downloader = downloader
+        self.max_workers = max(1, max_workers)
+        self.scheduler = scheduler or BandwidthScheduler()
+        self.fragments_per_job = fragments_per_job
+        self.on_update = on_update
+        self.on_finished = on_finished
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="download"
+        )
+        self._jobs: dict[int, DownloadJob] = {}
+        self._futures: dict[int, Future] = {}
+        # Jobs stopped by cancel() rather than by shutdown; those aren't resumed later
+        self._cancelled: set[int] = set()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        logger.info(f"DownloadQueue initialized with {self.max_workers} workers")
+
+    def submit(
+        self,
+        url: str,
+        priority: int = 1,
+        audio_only: bool = False,
+        resume: Optional[JournalEntry] = None,
+        sections: Optional[list[Segment]] = None
+    ) -> DownloadJob:
+        """
+        Queue a download, of only the given sections if any. A URL already
+        queued or running for the same video, mode and sections returns that
+        job instead, so the two don't share one file.
+        """
+        key = cache_key(url)
+        sections = list(sections or ())
+        with self._lock:
+            for other in self._jobs.values():
+                if (
+                    not other.done and other.audio_only == audio_only and other.sections == sections
+                    and cache_key(other.url) == key
+                ):
+                    logger.info(f"{url} is already queued as job {other.id}")
+                    return other
+            job = DownloadJob(
+                id=next(self._ids), url=url, priority=priority, audio_only=audio_only,
+                sections=sections, resume=resume
+            )
+            self._jobs[job.id] = job
+            self._futures[job.id] = self._executor.submit(self._run, job)
+        logger.info(f"Queued download job {job.id}: {url}")
+        self._notify(job)
+        return job
+
+    def submit_many(
+        self,
+        urls: list[str],
+        priority: int = 1,
+        audio_only: bool = False,
+        sections: Optional[list[Segment]] = None
+    ) -> list[DownloadJob]:
+        return [self.submit(url, priority, audio_only, sections=sections) for url in urls]
+
+    def resume_unfinished(self) -> list[DownloadJob]:
+        """Re-queue downloads the journal says were interrupted by a crash, exit or network drop."""
+        self.downloader.journal.prune()
+        entries = self.downloader.journal.unfinished()
+        if entries:
+            logger.info(f"Resuming {len(entries)} unfinished downloads")
+        return [self.submit(entry.url, resume=entry, sections=entry.sections) for entry in entries]
+
+    def cancel(self, job_id: int) -> bool:
+        """
+        Cancel a job. A job not yet picked up by a worker is dropped at once;
+        one waiting for a connection or running stops shortly after (a
+        running one at its next progress update) and is then reported as
+        CANCELLED.
+        """
+        with self._lock:
+            future = self._futures.get(job_id)
+            job = self._jobs.get(job_id)
+            if not future or not job or job.done:
+                return False
+            self._cancelled.add(job_id)
+        job.cancel_event.set()
+        if not future.cancel():
+            logger.info(f"Stopping download job {job_id}")
+            return True
+        if job.resume:
+            self.downloader.journal.finish(job.resume)
+        job.status = JobStatus.CANCELLED
+        job.message = "Cancelled"
+        job.finished_at = time.monotonic()
+        logger.info(f"Cancelled download job {job_id}")
+        self._notify(job, finished=True)
+        return True
+
+    def jobs(self) -> list[DownloadJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def get_job(self, job_id: int) -> Optional[DownloadJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def active_jobs(self) -> list[DownloadJob]:
+        return [job for job in self.jobs() if not job.done]
+
+    def total_speed(self) -> float:
+        return self.scheduler.total_rate()
+
+    def clear_finished(self):
+        with self._lock:
+            for job_id in [j.id for j in self._jobs.values() if j.done]:
+                self._jobs.pop(job_id, None)
+                self._futures.pop(job_id, None)
+                self._cancelled.discard(job_id)
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = SHUTDOWN_TIMEOUT_SECONDS):
+        """
+        Drop queued jobs and stop running ones. Stopped downloads stay in the
+        journal as running, so resume_unfinished picks them up next time.
+        With wait, block until the workers exit or timeout runs out.
+        """
+        logger.info(f"Shutting down DownloadQueue (wait={wait})")
+        for job in self.active_jobs():
+            job.cancel_event.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if wait:
+            with self._lock:
+                futures = list(self._futures.values())
+            concurrent.futures.wait(futures, timeout=timeout)
+
+    def _run(self, job: DownloadJob):
+        lease = None
+
+        def on_progress(progress: Progress):
+            job.progress = progress.fraction
+            job.message = progress.status
+            job.downloaded_bytes = progress.done
+            job.total_bytes = progress.total
+            job.speed = progress.rate
+            job.eta = progress.eta
+            self._notify(job)
+
+        try:
+            # The job stays QUEUED while it waits for a free connection
+            lease = self.scheduler.acquire(
+                f"job-{job.id}", urlparse(job.url).hostname or "", job.priority, self.fragments_per_job,
+                cancel=job.cancel_event
+            )
+            if lease is None:
+                raise DownloadCancelled(job.resume)
+            job.status = JobStatus.RUNNING
+            job.started_at = time.monotonic()
+            job.message = "Starting..."
+            logger.info(f"Download job {job.id} started: {job.url}")
+            self._notify(job)
+            if job.sections:
+                job.result = self.downloader.download_sections(
+                    job.url, job.sections, progress_callback=on_progress, resume=job.resume, lease=lease,
+                    audio_only=job.audio_only, cancel=job.cancel_event
+                )
+            else:
+                job.result = self.downloader.download(
+                    job.url, on_progress, resume=job.resume, lease=lease, audio_only=job.audio_only,
+                    cancel=job.cancel_event
+                )
+            job.status = JobStatus.FINISHED
+            job.progress = 1.0
+            job.message = "Complete!"
+            logger.info(f"Download job {job.id} finished: {job.result}")
+        except DownloadCancelled as e:
+            # Before the job counts as done, which lets clear_finished forget it
+            with self._lock:
+                by_user = job.id in self._cancelled
+            job.status = JobStatus.CANCELLED
+            job.message = "Cancelled"
+            if by_user and e.entry:
+                # Nothing to resume: drop it from the journal
+                self.downloader.journal.finish(e.entry)
+            logger.info(f"Download job {job.id} stopped")
+        except Exception as e:
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+            job.message = "Failed"
+            logger.error(f"Download job {job.id} failed: {e}")
+        finally:
+            if lease:
+                lease.release()
+            job.speed = 0.0
+            job.eta = None
+            job.finished_at = time.monotonic()
+            self._notify(job, finished=True)
+
+    def _notify(self, job: DownloadJob, finished: bool = False):
+        try:
+            if self.on_update:
+                self.on_update(job)
+            if finished and self.on_finished:
+                self.on_finished(job)
+        except Exception as e:
+            logger.error(f"Download queue listener failed: {e}", exc_info=True)
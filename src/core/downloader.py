@@ -1,128 +1,298 @@
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Callable, Iterator, Optional
 import yt_dlp
-import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
 from .logger import get_logger
+from .media_processor import Segment
+from .bandwidth import DEFAULT_FRAGMENTS_PER_JOB, BandwidthLease
+from .download_archive import DownloadArchive
+from .job_journal import JobJournal, JournalEntry
+from .metadata_cache import MetadataCache, VideoMetadata
+from .progress import Progress, ProgressAggregator
+from .urls import cache_key, info_video_id
 
 logger = get_logger(__name__)
 
+# Format selection with multiple fallbacks
+# Priority: mp4 video+audio combo → best mp4 → best overall
+VIDEO_FORMAT = "bestvideo[ext=mp4]+bestaudio[ext=m4a]/bestvideo[ext=mp4]+bestaudio/best[ext=mp4]/best"
+# Audio-only: a single audio stream, so nothing is merged; muxed "best" only as a last resort
+AUDIO_FORMAT = "bestaudio[ext=m4a]/bestaudio/best"
+
+# Exponential backoff between retries: 1s, 2s, 4s, ... capped at 60s
+RETRIES = 10
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+
+# Idle YoutubeDL instances kept per option profile
+MAX_IDLE_SESSIONS = 4
+
+# Extra time fetched around each requested range so stream-copied cuts still
+# contain the keyframe before the segment start
+DEFAULT_SECTION_PADDING_MS = 2000
+
+
+class DownloadCancelled(RuntimeError):
+    """
+    Raised by Downloader.download and download_sections when their cancel
+    event is set. The journal entry is left as running, so the download is
+    resumed on the next launch unless the caller discards it. entry is None
+    if the job was stopped before it had one.
+    """
+    
+    def __init__(self, entry: Optional[JournalEntry]):
+        super().__init__("Download cancelled")
+        self.entry = entry
+
+
+@dataclass
+class SectionDownload:
+    path: Path
+    start_ms: int
+    end_ms: int
+    segments: list[Segment]
+
+
+def _backoff(attempt: int) -> float:
+    return min(BACKOFF_BASE_SECONDS * 2 ** attempt, BACKOFF_MAX_SECONDS)
+
+
+def _plan_sections(segments: list[Segment], padding_ms: int) -> list[tuple[int, int, list[Segment]]]:
+    """Pad each segment and merge overlapping ranges so shared footage is fetched once."""
+    sections = []
+    for seg in sorted(segments, key=lambda s: s.start_ms):
+        start = max(0, seg.start_ms - padding_ms)
+        end = seg.end_ms + padding_ms
+        if sections and start <= sections[-1][1]:
+            prev_start, prev_end, members = sections[-1]
+            sections[-1] = (prev_start, max(prev_end, end), members + [seg])
+        else:
+            sections.append((start, end, [seg]))
+    return sections
+
+
+def _section_format(selector: str, start_ms: int, end_ms: int) -> str:
+    """Archive format key for one downloaded range, so ranges are looked up separately from whole videos."""
+    return f"{selector} [{start_ms}-{end_ms}]"
+
+
+def _section_results(
+    sections: list[tuple[int, int, list[Segment]]],
+    paths: dict[int, Path]
+) -> list[SectionDownload]:
+    results = []
+    for start, end, members in sections:
+        rebased = [
+            Segment(name=seg.name, start_ms=seg.start_ms - start, end_ms=seg.end_ms - start)
+            for seg in members
+        ]
+        results.append(SectionDownload(path=paths[start], start_ms=start, end_ms=end, segments=rebased))
+    return results
+
+
+class _Session:
+    """A long-lived YoutubeDL whose hooks forward to whichever call currently holds it."""
+    
+    def __init__(self, params: dict):
+        self.progress_hook = None
+        self.postprocessor_hook = None
+        self.ydl = yt_dlp.YoutubeDL({
+            **params,
+            "progress_hooks": [self._on_progress],
+            "postprocessor_hooks": [self._on_postprocess],
+        })
+    
+    def _on_progress(self, d):
+        if self.progress_hook:
+            self.progress_hook(d)
+    
+    def _on_postprocess(self, d):
+        if self.postprocessor_hook:
+            self.postprocessor_hook(d)
+
+
+class YoutubeDLPool:
+    """
+    Keeps configured YoutubeDL instances warm between calls.
+    
+    Building a YoutubeDL loads extractors and cookies, and each one owns its
+    own HTTP connection pool, so reusing instances skips that setup and keeps
+    TLS connections alive. Sessions are grouped by their static options; the
+    options that change per call (format, output template, ranges) are
+    applied on checkout and restored on return. Each session is used by one
+    thread at a time; a session whose call raised is closed, not reused.
+    """
+    
+    def __init__(self, max_idle: int = MAX_IDLE_SESSIONS):
+        self.max_idle = max_idle
+        self._idle: dict[str, list[_Session]] = {}
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def session(
+        self,
+        params: dict,
+        call_opts: Optional[dict] = None,
+        progress_hook: Optional[Callable[[dict], None]] = None,
+        postprocessor_hook: Optional[Callable[[dict], None]] = None
+    ) -> Iterator[yt_dlp.YoutubeDL]:
+        key = repr(sorted(params.items()))
+        with self._lock:
+            idle = self._idle.get(key)
+            session = idle.pop() if idle else None
+        if session is None:
+            logger.debug("Creating new yt-dlp session")
+            session = _Session(params)
+        
+        saved = self._apply(session.ydl, call_opts or {})
+        session.progress_hook = progress_hook
+        session.postprocessor_hook = postprocessor_hook
+        reusable = False
+        try:
+            yield session.ydl
+            reusable = True
+        finally:
+            session.progress_hook = None
+            session.postprocessor_hook = None
+            self._apply(session.ydl, saved)
+            self._release(key, session, reusable)
+    
+    def close(self):
+        with self._lock:
+            sessions = [s for idle in self._idle.values() for s in idle]
+            self._idle.clear()
+        for session in sessions:
+            session.ydl.close()
+    
+    def _apply(self, ydl: yt_dlp.YoutubeDL, opts: dict) -> dict:
+        """Overlay per-call options onto a session and return what they replaced."""
+        saved = {}
+        for name, value in opts.items():
+            saved[name] = ydl.params.get(name)
+            if name == "outtmpl" and isinstance(value, str):
+                value = {**ydl.params["outtmpl"], "default": value}
+            if value is None:
+                ydl.params.pop(name, None)
+            else:
+                ydl.params[name] = value
+            if name == "format":
+                # YoutubeDL compiles the format spec once in __init__
+                ydl.format_selector = ydl.build_format_selector(value) if value else None
+        return saved
+    
+    def _release(self, key: str, session: _Session, reusable: bool):
+        if reusable:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.max_idle:
+                    idle.append(session)
+                    return
+        session.ydl.close()
+
 
 class Downloader:
-    def __init__(self, output_dir: Path):
+    def __init__(
+        self,
+        output_dir: Path,
+        metadata_cache: Optional[MetadataCache] = None,
+        archive: Optional[DownloadArchive] = None,
+        journal: Optional[JobJournal] = None,
+        concurrent_fragments: int = DEFAULT_FRAGMENTS_PER_JOB,
+        sessions: Optional[YoutubeDLPool] = None
+    ):
         self.output_dir = output_dir
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.metadata_cache = metadata_cache or MetadataCache()
+        self.archive = archive or DownloadArchive()
+        self.journal = journal or JobJournal()
+        self.concurrent_fragments = max(1, concurrent_fragments)
+        self.sessions = sessions or YoutubeDLPool()
         logger.info(f"Downloader initialized with output dir: {self.output_dir}")
     
     def download(
         self,
         url: str,
-        progress_callback: Optional[Callable[[float, str], None]] = None
+        progress_callback: Optional[Callable[[Progress], None]] = None,
+        force: bool = False,
+        resume: Optional[JournalEntry] = None,
+        lease: Optional[BandwidthLease] = None,
+        audio_only: bool = False,
+        cancel: Optional[threading.Event] = None
     ) -> Path:
-        logger.info(f"Starting download: {url}")
-        output_template = str(self.output_dir / "%(title)s.%(ext)s")
+        selector = AUDIO_FORMAT if audio_only else VIDEO_FORMAT
+        if resume and resume.selector:
+            selector = resume.selector
+        logger.info(f"Starting download: {url} (audio_only={selector == AUDIO_FORMAT})")
+        progress = self._progress_aggregator(progress_callback)
+        video_id = self.archive.resolve(url)
+        if video_id and not force:
+            existing = self.archive.lookup(video_id, selector)
+            if existing:
+                logger.info(f"Already downloaded {video_id}, reusing: {existing}")
+                if resume:
+                    self.journal.finish(resume)
+                progress.finish("Already downloaded")
+                return existing
+        
+        if resume:
+            entry = self.journal.resume(resume)
+            logger.info(f"Resuming journaled download {entry.id} (attempt {entry.attempts}, {entry.downloaded_bytes} bytes so far)")
+        else:
+            entry = self.journal.start(url, selector)
+        
+        # The id keeps two videos with the same title (or two jobs) off each other's files
+        output_template = str(self.output_dir / "%(title)s [%(id)s].%(ext)s")
         logger.debug(f"Output template: {output_template}")
         logger.debug(f"Output directory: {self.output_dir}")
         logger.debug(f"Output directory exists: {self.output_dir.exists()}")
         
-        # Track the final filename (after all post-processing)
-        final_file = None
-        files_before = set(os.listdir(self.output_dir)) if self.output_dir.exists() else set()
-        logger.debug(f"Files before download: {files_before}")
+        count_bytes = self._byte_counter(lease)
+        
+        def check_cancel():
+            # yt-dlp has no cancel of its own; raising from a hook unwinds the download
+            if cancel and cancel.is_set():
+                raise DownloadCancelled(entry)
         
         def progress_hook(d):
+            check_cancel()
             if d["status"] == "downloading":
                 total = d.get("total_bytes") or d.get("total_bytes_estimate", 0)
                 downloaded = d.get("downloaded_bytes", 0)
-                if total > 0:
-                    percent = (downloaded / total) * 100
-                    logger.debug(f"Download progress: {percent:.1f}%")
-                    if progress_callback:
-                        progress_callback(downloaded / total, "Downloading...")
+                count_bytes(d)
+                self.journal.progress(entry, d.get("tmpfilename"), downloaded, total)
+                progress.update(status="Downloading...", done=downloaded, total=total)
             elif d["status"] == "finished":
                 logger.debug(f"Download phase finished: {d.get('filename', 'unknown')}")
-                if progress_callback:
-                    progress_callback(0.9, "Processing...")
+                progress.update(fraction=0.9, status="Processing...")
             elif d["status"] == "error":
                 logger.error(f"yt-dlp error in hook: {d.get('info_dict', {}).get('exception')}")
         
         def postprocessor_hook(d):
-            nonlocal final_file
-            # Capture the final filename after all post-processing (including merging)
+            check_cancel()
             if d["status"] == "finished":
-                if "info_dict" in d:
-                    # Get the final filepath from info_dict
-                    filepath = d["info_dict"].get("filepath")
-                    if filepath:
-                        final_file = Path(filepath)
-                        logger.info(f"Post-processor finished, final file: {final_file}")
-                if progress_callback:
-                    progress_callback(1.0, "Complete!")
-        
-        opts = {
-            # Format selection with multiple fallbacks
-            # Priority: mp4 video+audio combo → best mp4 → best overall
-            "format": "bestvideo[ext=mp4]+bestaudio[ext=m4a]/bestvideo[ext=mp4]+bestaudio/best[ext=mp4]/best",
-            "outtmpl": output_template,
-            "progress_hooks": [progress_hook],
-            "postprocessor_hooks": [postprocessor_hook],
-            # Merge to mp4 format
-            "merge_output_format": "mp4",
-            "quiet": False,
-            "no_warnings": False,
-            # Increase socket timeout for slow/unreliable connections
-            "socket_timeout": 30,
-            # Retry failed fragments
-            "retries": 3,
-            "fragment_retries": 3,
-        }
+                logger.debug(f"Post-processor {d.get('postprocessor')} finished")
+        
+        opts = self._call_opts(output_template, lease, selector)
+        if entry.format_id:
+            # Same streams as the interrupted attempt, so yt-dlp picks up the .part files
+            opts["format"] = entry.format_id
         
         try:
             logger.debug(f"yt-dlp options: format={opts['format']}, outtmpl={opts['outtmpl']}")
-            with yt_dlp.YoutubeDL(opts) as ydl:
-                info = ydl.download([url])
-                logger.debug(f"yt-dlp download returned: {info}")
-            
-            # Check directory contents after download
-            files_after = set(os.listdir(self.output_dir)) if self.output_dir.exists() else set()
-            logger.debug(f"Files after download: {files_after}")
-            logger.debug(f"Final file from postprocessor hook: {final_file}")
-            
-            # Determine the actual downloaded file
-            downloaded_file = None
+            with self.sessions.session(self._download_params(), opts, progress_hook, postprocessor_hook) as ydl:
+                # Resolve the output name from the info dict up front instead of
+                # diffing the Downloads folder, so parallel jobs never see each other's files
+                info = ydl.extract_info(url, download=False)
+                expected_file = Path(ydl.prepare_filename(info))
+                logger.debug(f"Expected output file: {expected_file}")
+                self.journal.plan(entry, info.get("format_id") or opts["format"], expected_file)
+                info = ydl.process_ie_result(info, download=True)
             
-            # First priority: use the postprocessor hook result if it exists
-            if final_file and final_file.exists():
-                downloaded_file = final_file
-                logger.info(f"Using file from postprocessor hook: {downloaded_file}")
-            else:
-                # Fallback: find new files in directory
-                logger.debug("Searching output directory for new files")
-                new_files = files_after - files_before
-                # Filter out partial/temp files
-                new_files = {f for f in new_files if not f.endswith(('.part', '.ytdl', '.temp'))}
-                logger.debug(f"New files detected: {new_files}")
-                
-                if new_files:
-                    # Find the newest video file (prefer mp4)
-                    video_extensions = ('.mp4', '.mkv', '.webm', '.avi')
-                    video_files = [f for f in new_files if f.lower().endswith(video_extensions)]
-                    
-                    if video_files:
-                        newest_file = max(
-                            [self.output_dir / f for f in video_files],
-                            key=lambda p: p.stat().st_mtime
-                        )
-                    else:
-                        newest_file = max(
-                            [self.output_dir / f for f in new_files],
-                            key=lambda p: p.stat().st_mtime
-                        )
-                    downloaded_file = newest_file
-                    logger.info(f"Found downloaded file via directory scan: {downloaded_file}")
-                else:
-                    logger.error(f"No new files found. Before: {files_before}, After: {files_after}")
-                    logger.error(f"Output directory contents: {list(self.output_dir.iterdir())}")
-                    raise RuntimeError("Download completed but output file not found")
+            downloaded_file = self._final_path(info) or expected_file
+            logger.info(f"Final output file: {downloaded_file}")
             
             # Verify file exists and is not empty
             if not downloaded_file.exists():
@@ -144,39 +314,289 @@ class Downloader:
                 )
             
             logger.info(f"Successfully downloaded to: {downloaded_file}")
+            self._archive_download(url, video_id or info_video_id(info), selector, info, downloaded_file)
+            self.journal.finish(entry)
+            progress.finish()
             return downloaded_file
+        except DownloadCancelled:
+            logger.info(f"Download cancelled: {url}")
+            raise
         except yt_dlp.utils.DownloadError as e:
-            error_msg = str(e)
-            logger.error(f"yt-dlp download error: {error_msg}")
+            if cancel and cancel.is_set():
+                # Cancelled inside a part of yt-dlp that reports errors instead of raising them
+                logger.info(f"Download cancelled: {url}")
+                raise DownloadCancelled(entry) from e
+            self.journal.fail(entry, str(e))
+            raise self._translate_download_error(e)
+        except Exception as e:
+            logger.error(f"Download failed: {e}", exc_info=True)
+            self.journal.fail(entry, str(e))
+            raise
+    
+    def download_sections(
+        self,
+        url: str,
+        segments: list[Segment],
+        padding_ms: int = DEFAULT_SECTION_PADDING_MS,
+        progress_callback: Optional[Callable[[Progress], None]] = None,
+        force: bool = False,
+        resume: Optional[JournalEntry] = None,
+        lease: Optional[BandwidthLease] = None,
+        audio_only: bool = False,
+        cancel: Optional[threading.Event] = None
+    ) -> list[SectionDownload]:
+        """
+        Download only the time ranges covered by segments instead of the whole video.
+        
+        Ranges are stream-copied, so each one is widened by padding_ms on both
+        sides to make sure the nearest keyframes are included. Overlapping
+        padded ranges are fetched once, and ranges already in the archive are
+        not fetched again. The returned segments are rebased onto their
+        section file and can be passed straight to export_segments.
+        
+        Journaling and cancelling work as in download().
+        """
+        if not segments:
+            raise ValueError("No segments to download")
+        
+        selector = AUDIO_FORMAT if audio_only else VIDEO_FORMAT
+        if resume and resume.selector:
+            selector = resume.selector
+        sections = _plan_sections(segments, padding_ms)
+        logger.info(f"Starting section download: {url} ({len(segments)} segments in {len(sections)} ranges)")
+        progress = self._progress_aggregator(progress_callback)
+        
+        paths: dict[int, Path] = {}
+        video_id = self.archive.resolve(url)
+        if video_id and not force:
+            for start, end, _ in sections:
+                existing = self.archive.lookup(video_id, _section_format(selector, start, end))
+                if existing:
+                    paths[start] = existing
+        missing = [section for section in sections if section[0] not in paths]
+        if not missing:
+            logger.info(f"All {len(sections)} ranges of {video_id} already downloaded")
+            if resume:
+                self.journal.finish(resume)
+            progress.finish("Already downloaded")
+            return _section_results(sections, paths)
+        
+        if resume:
+            entry = self.journal.resume(resume)
+            logger.info(f"Resuming journaled section download {entry.id} (attempt {entry.attempts})")
+        else:
+            entry = self.journal.start(url, selector, segments)
+        
+        output_template = str(
+            self.output_dir / "%(title)s [%(id)s] [%(section_start)s-%(section_end)s].%(ext)s"
+        )
+        
+        # Files finished per range, keyed by section_start. A range whose
+        # format is separate video and audio downloads two files before merging.
+        finished_files: dict[float, int] = {}
+        count_bytes = self._byte_counter(lease)
+        
+        def check_cancel():
+            if cancel and cancel.is_set():
+                raise DownloadCancelled(entry)
+        
+        def files_in_range(info: dict) -> int:
+            return len(info.get("requested_formats") or ()) or 1
+        
+        def progress_hook(d):
+            check_cancel()
+            info = d.get("info_dict") or {}
+            section = info.get("section_start")
+            if d["status"] == "downloading":
+                total = d.get("total_bytes") or d.get("total_bytes_estimate", 0)
+                downloaded = d.get("downloaded_bytes", 0)
+                count_bytes(d)
+                self.journal.progress(entry, d.get("tmpfilename"), downloaded, total)
+                files = files_in_range(info)
+                completed = sum(1 for n in finished_files.values() if n >= files)
+                current = min(completed + 1, len(missing))
+                overall = None
+                if total > 0:
+                    within = (finished_files.get(section, 0) + downloaded / total) / files
+                    overall = min((completed + within) / len(missing), 1.0)
+                progress.update(
+                    fraction=overall, status=f"Downloading range {current} of {len(missing)}...",
+                    done=downloaded, total=total
+                )
+            elif d["status"] == "finished":
+                finished_files[section] = finished_files.get(section, 0) + 1
+            elif d["status"] == "error":
+                logger.error(f"yt-dlp error in hook: {d.get('info_dict', {}).get('exception')}")
+        
+        def postprocessor_hook(d):
+            check_cancel()
+        
+        opts = self._call_opts(output_template, lease, selector)
+        opts["download_ranges"] = yt_dlp.utils.download_range_func(
+            None, [(start / 1000, end / 1000) for start, end, _ in missing]
+        )
+        
+        try:
+            with self.sessions.session(self._download_params(), opts, progress_hook, postprocessor_hook) as ydl:
+                info = ydl.extract_info(url, download=True)
             
-            # Provide helpful error messages based on error type
-            if "empty" in error_msg.lower():
-                raise RuntimeError(
-                    "Download produced an empty file. This usually means:\n"
-                    "- Video is geo-blocked or restricted\n"
-                    "- Video requires authentication\n"
-                    "- Video is temporarily unavailable\n"
-                    "- Network connection was interrupted\n\n"
-                    "Try a different video or check your internet connection."
+            # One requested download per range, each tagged with the section it covers
+            fetched = {
+                round(d["section_start"] * 1000): Path(d["filepath"])
+                for d in info.get("requested_downloads") or []
+                if d.get("filepath") and d.get("section_start") is not None
+            }
+            for start, end, _ in missing:
+                path = fetched.get(start)
+                if not path or not path.exists() or path.stat().st_size == 0:
+                    raise RuntimeError(f"Range {start}ms - {end}ms was not downloaded")
+                paths[start] = path
+                self._archive_download(
+                    url, video_id or info_video_id(info), _section_format(selector, start, end), info, path
                 )
-            elif "age" in error_msg.lower() or "restricted" in error_msg.lower():
-                raise RuntimeError(f"Video is age-restricted or restricted: {error_msg}")
-            elif "not found" in error_msg.lower() or "no such file" in error_msg.lower():
-                raise RuntimeError(f"Video not found or no longer available: {error_msg}")
-            else:
-                raise RuntimeError(f"Failed to download video: {error_msg}")
+            
+            self.journal.finish(entry)
+            progress.finish()
+            logger.info(f"Successfully downloaded {len(missing)} ranges")
+            return _section_results(sections, paths)
+        except DownloadCancelled:
+            logger.info(f"Section download cancelled: {url}")
+            raise
+        except yt_dlp.utils.DownloadError as e:
+            if cancel and cancel.is_set():
+                logger.info(f"Section download cancelled: {url}")
+                raise DownloadCancelled(entry) from e
+            self.journal.fail(entry, str(e))
+            raise self._translate_download_error(e)
         except Exception as e:
-            logger.error(f"Download failed: {e}", exc_info=True)
+            logger.error(f"Section download failed: {e}", exc_info=True)
+            self.journal.fail(entry, str(e))
             raise
     
-    def get_video_info(self, url: str) -> dict:
+    def _final_path(self, info: dict) -> Optional[Path]:
+        # requested_downloads carries the path after merging and post-processing
+        downloads = info.get("requested_downloads") or []
+        filepath = downloads[-1].get("filepath") if downloads else None
+        return Path(filepath) if filepath else None
+    
+    def _archive_download(self, url: str, video_id: Optional[str], selector: str, info: dict, path: Path):
+        if not video_id:
+            logger.debug(f"No video ID for {url}, not archiving")
+            return
+        try:
+            self.archive.record(video_id, selector, info.get("format_id") or "", path)
+            self.archive.add_alias(url, video_id)
+        except Exception as e:
+            # The download itself succeeded; a broken index only costs a re-fetch later
+            logger.warning(f"Failed to record download in archive: {e}")
+    
+    def _progress_aggregator(self, progress_callback: Optional[Callable[[Progress], None]]) -> ProgressAggregator:
+        def publish(p: Progress):
+            logger.debug(f"Download progress: {p.fraction * 100:.1f}% ({p.rate / 1024:.0f} KB/s)")
+            if progress_callback:
+                progress_callback(p)
+        
+        return ProgressAggregator(publish)
+    
+    def _byte_counter(self, lease: Optional[BandwidthLease]) -> Callable[[dict], None]:
+        """Turn yt-dlp's cumulative per-file byte counts into deltas charged to the lease."""
+        last_seen: dict[str, int] = {}
+        
+        def count(d: dict):
+            if not lease:
+                return
+            name = d.get("tmpfilename") or d.get("filename") or ""
+            downloaded = d.get("downloaded_bytes") or 0
+            delta = downloaded - last_seen.get(name, 0)
+            last_seen[name] = downloaded
+            lease.consume(delta)
+        
+        return count
+    
+    def _download_params(self) -> dict:
+        # Options shared by every pooled download session
+        return {
+            # watch?v=...&list=... links mean the one video, not the whole playlist
+            "noplaylist": True,
+            # Merge to mp4 format
+            "merge_output_format": "mp4",
+            "quiet": False,
+            "no_warnings": False,
+            # Increase socket timeout for slow/unreliable connections
+            "socket_timeout": 30,
+            # Retry failed requests and fragments with exponential backoff
+            "retries": RETRIES,
+            "fragment_retries": RETRIES,
+            "retry_sleep_functions": {"http": _backoff, "fragment": _backoff, "file_access": _backoff},
+            # Pick up existing .part files instead of starting over
+            "continuedl": True,
+        }
+    
+    def _call_opts(
+        self,
+        output_template: str,
+        lease: Optional[BandwidthLease] = None,
+        selector: str = VIDEO_FORMAT
+    ) -> dict:
+        # Options that vary per call, applied on top of a pooled session
+        return {
+            "format": selector,
+            "outtmpl": output_template,
+            "download_ranges": None,
+            # Fetch DASH/HLS fragments in parallel, within the scheduler's connection budget
+            "concurrent_fragment_downloads": lease.fragments if lease else self.concurrent_fragments,
+        }
+    
+    def _translate_download_error(self, e: Exception) -> RuntimeError:
+        error_msg = str(e)
+        logger.error(f"yt-dlp download error: {error_msg}")
+        
+        # Provide helpful error messages based on error type
+        if "empty" in error_msg.lower():
+            return RuntimeError(
+                "Download produced an empty file. This usually means:\n"
+                "- Video is geo-blocked or restricted\n"
+                "- Video requires authentication\n"
+                "- Video is temporarily unavailable\n"
+                "- Network connection was interrupted\n\n"
+                "Try a different video or check your internet connection."
+            )
+        elif "age" in error_msg.lower() or "restricted" in error_msg.lower():
+            return RuntimeError(f"Video is age-restricted or restricted: {error_msg}")
+        elif "not found" in error_msg.lower() or "no such file" in error_msg.lower():
+            return RuntimeError(f"Video not found or no longer available: {error_msg}")
+        else:
+            return RuntimeError(f"Failed to download video: {error_msg}")
+    
+    def close(self):
+        self.sessions.close()
+    
+    def get_video_info(self, url: str, refresh: bool = False) -> VideoMetadata:
+        key = cache_key(url)
+        if not refresh:
+            cached = self.metadata_cache.get(key)
+            if cached:
+                logger.debug(f"Video info cache hit: {key}")
+                return cached
+        
         logger.debug(f"Fetching video info: {url}")
-        opts = {"quiet": True, "no_warnings": True, "extract_flat": False}
+        params = {"quiet": True, "no_warnings": True, "extract_flat": False, "noplaylist": True}
+        # Same format selection as download() so the cached format IDs are the ones we'd fetch
+        opts = {"format": VIDEO_FORMAT}
+        started = time.monotonic()
         try:
-            with yt_dlp.YoutubeDL(opts) as ydl:
+            with self.sessions.session(params, opts) as ydl:
                 info = ydl.extract_info(url, download=False)
-                logger.debug(f"Video info: title={info.get('title')}, duration={info.get('duration')}s")
-                return info
+                logger.debug(
+                    f"Video info: title={info.get('title')}, duration={info.get('duration')}s "
+                    f"(fetched in {time.monotonic() - started:.2f}s)"
+                )
         except Exception as e:
             logger.error(f"Failed to fetch video info: {e}", exc_info=True)
             raise
+        
+        metadata = VideoMetadata.from_info(info_video_id(info) or key, info)
+        self.metadata_cache.put(key, metadata)
+        if metadata.video_id != key:
+            self.metadata_cache.put(metadata.video_id, metadata)
+        return metadata
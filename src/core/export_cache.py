@@ -0,0 +1,73 @@
+"""
+Finished exports kept by content: the same range of the same source with the
+same settings is served from the cache instead of being encoded again.
+"""
+import hashlib
+import os
+import shutil
+from pathlib import Path
+from typing import Optional
+from .logger import get_logger
+from .paths import get_cache_dir, trim_cache_dir
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3
+
+
+def _link_or_copy(src: Path, dst: Path):
+    # Hardlinks cost nothing; fall back to a copy across filesystems or on FAT/exFAT
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class ExportCache:
+    def __init__(self, cache_dir: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or get_cache_dir() / "exports"
+        self.max_bytes = max_bytes
+    
+    def key(self, source: Path, start_ms: int, end_ms: int, settings: str) -> str:
+        """Raises OSError if source can't be read."""
+        source = Path(source).resolve()
+        stat = source.stat()
+        fingerprint = f"{source}|{stat.st_size}|{stat.st_mtime_ns}|{start_ms}|{end_ms}|{settings}"
+        return hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()
+    
+    def fetch(self, key: str, output: Path) -> bool:
+        """Place the cached export for key at output. False on a miss."""
+        cached = self.cache_dir / f"{key}{output.suffix}"
+        if not cached.exists():
+            return False
+        try:
+            output.parent.mkdir(parents=True, exist_ok=True)
+            if not (output.exists() and output.samefile(cached)):
+                output.unlink(missing_ok=True)
+                _link_or_copy(cached, output)
+            cached.touch()
+        except OSError as e:
+            logger.warning(f"Could not reuse cached export for {output.name}: {e}")
+            return False
+        return True
+    
+    def store(self, key: str, output: Path):
+        """
+        Add a finished export. The cache entry may be a hardlink to output,
+        so anything that rewrites output must unlink it first rather than
+        truncate it in place.
+        """
+        cached = self.cache_dir / f"{key}{output.suffix}"
+        partial = cached.with_name(cached.name + ".part")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            partial.unlink(missing_ok=True)
+            _link_or_copy(output, partial)
+            partial.replace(cached)
+            cached.touch()
+        except OSError as e:
+            partial.unlink(missing_ok=True)
+            logger.warning(f"Could not cache export {output.name}: {e}")
+            return
+        for evicted in trim_cache_dir(self.cache_dir, "*", self.max_bytes, keep=cached):
+            logger.debug(f"Evicted {evicted.name} from the export cache")
@@ -0,0 +1,156 @@
+"""Runs ffmpeg as a cancellable child process and parses its -progress output."""
+import subprocess
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# Lines of stderr kept for error messages; the rest is dropped as it streams in
+STDERR_TAIL_LINES = 200
+# A job that prints no progress for this long is considered hung
+DEFAULT_STALL_TIMEOUT = 120.0
+POLL_INTERVAL = 0.2
+
+
+class FFmpegError(RuntimeError):
+    def __init__(self, message: str, returncode: Optional[int] = None, stderr: str = ""):
+        super().__init__(message)
+        self.returncode = returncode
+        self.stderr = stderr
+
+
+class FFmpegTimeout(FFmpegError):
+    pass
+
+
+class FFmpegCancelled(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class FFmpegProgress:
+    # Position in the output, in milliseconds of media written
+    out_time_ms: int = 0
+    frame: int = 0
+    fps: float = 0.0
+    # Multiple of realtime
+    speed: float = 0.0
+    total_size: int = 0
+    finished: bool = False
+
+
+def _parse_number(value: str, kind=float, default=0):
+    try:
+        return kind(value.strip().rstrip("x"))
+    except ValueError:
+        # ffmpeg reports N/A until the first frame is out
+        return default
+
+
+class FFmpegRunner:
+    def __init__(self, timeout: Optional[float] = None, stall_timeout: Optional[float] = DEFAULT_STALL_TIMEOUT):
+        self.timeout = timeout
+        self.stall_timeout = stall_timeout
+    
+    def run(
+        self,
+        cmd: list[str],
+        progress_callback: Optional[Callable[[FFmpegProgress], None]] = None,
+        cancel: Optional[threading.Event] = None,
+        outputs: Iterable[Path] = ()
+    ) -> str:
+        """
+        Run an ffmpeg command line (ffmpeg path first) to completion and
+        return the tail of its stderr. Raises FFmpegCancelled when cancel is
+        set, FFmpegTimeout on timeout or stall, FFmpegError on a non-zero
+        exit; in all three cases the child is killed and outputs are deleted.
+        """
+        cmd = [cmd[0], "-hide_banner", "-nostdin", "-nostats", "-progress", "pipe:1", *cmd[1:]]
+        logger.debug(f"FFmpeg command: {' '.join(cmd)}")
+        stderr_tail: deque[str] = deque(maxlen=STDERR_TAIL_LINES)
+        last_activity = [time.monotonic()]
+        
+        proc = subprocess.Popen(
+            cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            text=True, encoding="utf-8", errors="replace", bufsize=1
+        )
+        readers = [
+            threading.Thread(
+                target=self._read_progress, args=(proc.stdout, progress_callback, last_activity), daemon=True
+            ),
+            threading.Thread(target=self._read_stderr, args=(proc.stderr, stderr_tail), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+        
+        started = time.monotonic()
+        failure: Optional[BaseException] = None
+        while True:
+            try:
+                proc.wait(timeout=POLL_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+            now = time.monotonic()
+            if cancel is not None and cancel.is_set():
+                failure = FFmpegCancelled("Cancelled")
+            elif self.timeout and now - started > self.timeout:
+                failure = FFmpegTimeout(f"FFmpeg timed out after {self.timeout:g}s")
+            elif self.stall_timeout and now - last_activity[0] > self.stall_timeout:
+                failure = FFmpegTimeout(f"FFmpeg made no progress for {self.stall_timeout:g}s")
+            if failure:
+                proc.kill()
+                proc.wait()
+                break
+        
+        for reader in readers:
+            reader.join()
+        stderr = "".join(stderr_tail)
+        if failure is None and proc.returncode != 0:
+            failure = FFmpegError(f"FFmpeg exited with code {proc.returncode}", proc.returncode, stderr)
+        if failure is not None:
+            if isinstance(failure, FFmpegError):
+                failure.stderr = stderr
+            for output in outputs:
+                Path(output).unlink(missing_ok=True)
+            raise failure
+        return stderr
+    
+    def _read_progress(self, stream, callback, last_activity: list[float]):
+        fields: dict[str, str] = {}
+        for line in stream:
+            last_activity[0] = time.monotonic()
+            key, _, value = line.strip().partition("=")
+            if key != "progress":
+                fields[key] = value
+                continue
+            # A block of key=value lines ends with progress=continue|end
+            if callback:
+                if "out_time_us" in fields:
+                    out_time_us = _parse_number(fields["out_time_us"], int)
+                else:
+                    # Despite the name, out_time_ms is in microseconds too
+                    out_time_us = _parse_number(fields.get("out_time_ms", ""), int)
+                progress = FFmpegProgress(
+                    out_time_ms=max(out_time_us // 1000, 0),
+                    frame=_parse_number(fields.get("frame", ""), int),
+                    fps=_parse_number(fields.get("fps", "")),
+                    speed=_parse_number(fields.get("speed", "")),
+                    total_size=_parse_number(fields.get("total_size", ""), int),
+                    finished=value == "end",
+                )
+                try:
+                    callback(progress)
+                except Exception as e:
+                    # Keep draining stdout, or ffmpeg would block on a full pipe
+                    logger.error(f"FFmpeg progress callback failed: {e}", exc_info=True)
+            fields.clear()
+    
+    def _read_stderr(self, stream, tail: deque):
+        for line in stream:
+            tail.append(line)
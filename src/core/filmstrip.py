@@ -0,0 +1,144 @@
+"""
+Timeline filmstrip: thumbnails sampled at a fixed interval by a single
+ffmpeg pass and packed into sprite sheets, cached on disk per source.
+"""
+import hashlib
+import json
+import math
+import shutil
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+from .ffmpeg_runner import FFmpegError, FFmpegRunner
+from .logger import get_logger
+from .paths import get_cache_dir
+
+logger = get_logger(__name__)
+
+# Thumbnails are drawn at half this size on the timeline; the extra covers high-DPI
+# screens. Sources that aren't 16:9 are letterboxed into the same cell.
+THUMB_WIDTH = 106
+THUMB_HEIGHT = 60
+SHEET_COLUMNS = 10
+SHEET_ROWS = 10
+# Long sources are sampled more sparsely so a filmstrip stays at a few sheets
+MIN_INTERVAL_MS = 2000
+MAX_THUMBS = 600
+# Layout of the cached files; bump to rebuild filmstrips made by older versions
+FORMAT_VERSION = 1
+
+
+@dataclass
+class Filmstrip:
+    directory: Path
+    interval_ms: int
+    count: int
+    thumb_width: int
+    thumb_height: int
+    columns: int = SHEET_COLUMNS
+    rows: int = SHEET_ROWS
+    
+    @property
+    def per_sheet(self) -> int:
+        return self.columns * self.rows
+    
+    def index_at(self, time_ms: int) -> int:
+        return min(max(int(time_ms // self.interval_ms), 0), self.count - 1)
+    
+    def sheet_path(self, sheet: int) -> Path:
+        # ffmpeg's image2 muxer numbers from 1
+        return self.directory / f"sheet_{sheet + 1:04d}.jpg"
+    
+    def locate(self, index: int) -> tuple[int, int, int]:
+        """(sheet, x, y) of thumbnail index: which sheet holds it and its top-left pixel there."""
+        sheet, cell = divmod(index, self.per_sheet)
+        row, column = divmod(cell, self.columns)
+        return sheet, column * self.thumb_width, row * self.thumb_height
+
+
+def interval_for(duration_ms: Optional[int]) -> int:
+    if not duration_ms:
+        return MIN_INTERVAL_MS
+    return max(MIN_INTERVAL_MS, math.ceil(duration_ms / MAX_THUMBS / 1000) * 1000)
+
+
+class FilmstripBuilder:
+    def __init__(self, ffmpeg_path: str, runner: Optional[FFmpegRunner] = None, cache_dir: Optional[Path] = None):
+        self.ffmpeg_path = ffmpeg_path
+        self.runner = runner or FFmpegRunner()
+        self.cache_dir = cache_dir or get_cache_dir() / "filmstrips"
+    
+    def directory_for(self, source: Path) -> Path:
+        source = Path(source).resolve()
+        stat = source.stat()
+        key = hashlib.sha1(f"{source}|{stat.st_size}|{stat.st_mtime_ns}".encode("utf-8")).hexdigest()
+        return self.cache_dir / key
+    
+    def load(self, source: Path) -> Optional[Filmstrip]:
+        meta = self.directory_for(source) / "filmstrip.json"
+        try:
+            record = json.loads(meta.read_text(encoding="utf-8"))
+            if record.pop("version", None) != FORMAT_VERSION:
+                return None
+            record["directory"] = meta.parent
+            return Filmstrip(**record)
+        except (OSError, ValueError, TypeError):
+            return None
+    
+    def build(
+        self,
+        source: Path,
+        duration_ms: Optional[int] = None,
+        cancel: Optional[threading.Event] = None
+    ) -> Filmstrip:
+        """
+        Sample one frame per interval into sprite sheets. Only keyframes are
+        decoded, which keeps this cheap on 4K sources; each thumbnail is the
+        keyframe nearest its slot.
+        """
+        directory = self.directory_for(source)
+        interval_ms = interval_for(duration_ms)
+        partial = directory.with_name(directory.name + ".part")
+        shutil.rmtree(partial, ignore_errors=True)
+        partial.mkdir(parents=True)
+        cmd = [
+            self.ffmpeg_path, "-y",
+            "-skip_frame", "nokey", "-i", str(source),
+            "-map", "0:v:0", "-an", "-sn",
+            "-vf", (
+                f"fps=1000/{interval_ms},"
+                f"scale={THUMB_WIDTH}:{THUMB_HEIGHT}:force_original_aspect_ratio=decrease,"
+                f"pad={THUMB_WIDTH}:{THUMB_HEIGHT}:(ow-iw)/2:(oh-ih)/2,"
+                f"tile={SHEET_COLUMNS}x{SHEET_ROWS}"
+            ),
+            "-q:v", "5",
+            str(partial / "sheet_%04d.jpg")
+        ]
+        logger.info(f"Building filmstrip for {source.name} every {interval_ms}ms")
+        try:
+            self.runner.run(cmd, cancel=cancel)
+        except FFmpegError as e:
+            shutil.rmtree(partial, ignore_errors=True)
+            raise RuntimeError(f"Filmstrip generation failed: {e}\n{e.stderr}") from e
+        except BaseException:
+            shutil.rmtree(partial, ignore_errors=True)
+            raise
+        
+        sheets = len(list(partial.glob("sheet_*.jpg")))
+        if not sheets:
+            shutil.rmtree(partial, ignore_errors=True)
+            raise RuntimeError(f"Filmstrip generation produced no frames for {source.name}")
+        if duration_ms:
+            count = max(1, math.ceil(duration_ms / interval_ms))
+        else:
+            # The last sheet may be part padding; those cells are simply black
+            count = sheets * SHEET_COLUMNS * SHEET_ROWS
+        filmstrip = Filmstrip(directory, interval_ms, count, THUMB_WIDTH, THUMB_HEIGHT)
+        record = asdict(filmstrip)
+        record.pop("directory")
+        record["version"] = FORMAT_VERSION
+        (partial / "filmstrip.json").write_text(json.dumps(record), encoding="utf-8")
+        shutil.rmtree(directory, ignore_errors=True)
+        partial.rename(directory)
+        return filmstrip
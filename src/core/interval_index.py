@@ -0,0 +1,119 @@
+"""
+Sorted index over [start, end] intervals (segments, in milliseconds) for
+point, range and edge queries in logarithmic time, plus overlap and merge
+analysis.
+"""
+import bisect
+from typing import Hashable, Iterable, Optional
+
+
+class IntervalIndex:
+    """
+    Immutable once built: rebuild it when the intervals change, which costs
+    one sort. Keys identify the intervals to the caller, e.g. list positions.
+    """
+    
+    def __init__(self, intervals: Iterable[tuple[int, int, Hashable]] = ()):
+        items = sorted(intervals, key=lambda item: (item[0], item[1]))
+        self._starts = [start for start, _, _ in items]
+        self._ends = [end for _, end, _ in items]
+        self._keys = [key for _, _, key in items]
+        # Binary tree over the intervals in start order, each node holding the
+        # furthest end below it, so queries skip whole subtrees that end too
+        # early. Node 1 is the root, node n's children are 2n and 2n + 1, and
+        # the leaves start at _leaves.
+        self._leaves = 1
+        while self._leaves < len(items):
+            self._leaves *= 2
+        self._max_end = [float("-inf")] * (2 * self._leaves)
+        self._max_end[self._leaves:self._leaves + len(items)] = self._ends
+        for node in range(self._leaves - 1, 0, -1):
+            self._max_end[node] = max(self._max_end[2 * node], self._max_end[2 * node + 1])
+        ends = sorted((end, i) for i, end in enumerate(self._ends))
+        self._sorted_ends = [end for end, _ in ends]
+        self._end_order = [i for _, i in ends]
+    
+    def __len__(self) -> int:
+        return len(self._starts)
+    
+    def overlapping(self, start: int, end: int) -> list[Hashable]:
+        """
+        Keys of intervals that share at least one point with [start, end], by
+        start. O(log n) per interval found, however long the intervals are.
+        """
+        # Only intervals starting at or before end can overlap; of those, the
+        # tree finds the ones that end at or after start
+        limit = bisect.bisect_right(self._starts, end)
+        found = []
+        stack = [(1, 0, self._leaves)]
+        while stack:
+            node, lo, hi = stack.pop()
+            if lo >= limit or self._max_end[node] < start:
+                continue
+            if hi - lo == 1:
+                found.append(self._keys[lo])
+                continue
+            mid = (lo + hi) // 2
+            # Right first, so the left half is popped and reported first
+            stack.append((2 * node + 1, mid, hi))
+            stack.append((2 * node, lo, mid))
+        return found
+    
+    def at(self, point: int) -> list[Hashable]:
+        return self.overlapping(point, point)
+    
+    def nearest_edge(self, point: int, tolerance: int) -> Optional[tuple[Hashable, str]]:
+        """
+        (key, "start" or "end") of the interval edge closest to point, if
+        one lies within tolerance. On a tie the start wins. Binary searches
+        the sorted starts and ends, then looks only at edges in range.
+        """
+        best = None
+        lo = bisect.bisect_left(self._starts, point - tolerance)
+        hi = bisect.bisect_right(self._starts, point + tolerance)
+        for i in range(lo, hi):
+            distance = abs(self._starts[i] - point)
+            if best is None or distance < best[0]:
+                best = (distance, 0, i)
+        lo = bisect.bisect_left(self._sorted_ends, point - tolerance)
+        hi = bisect.bisect_right(self._sorted_ends, point + tolerance)
+        for n in range(lo, hi):
+            distance = abs(self._sorted_ends[n] - point)
+            if best is None or (distance, 1) < best[:2]:
+                best = (distance, 1, self._end_order[n])
+        if best is None:
+            return None
+        return self._keys[best[2]], ("start", "end")[best[1]]
+    
+    def empty(self) -> list[Hashable]:
+        """Keys of intervals that end at or before they start."""
+        return [self._keys[i] for i in range(len(self)) if self._ends[i] <= self._starts[i]]
+    
+    def overlaps(self) -> list[tuple[Hashable, Hashable]]:
+        """
+        Pairs of keys whose intervals overlap by more than a shared endpoint.
+        Walks forward from each interval only over the pairs it reports.
+        """
+        pairs = []
+        for i in range(len(self)):
+            j = i + 1
+            while j < len(self) and self._starts[j] < self._ends[i]:
+                pairs.append((self._keys[i], self._keys[j]))
+                j += 1
+        return pairs
+    
+    def clusters(self, max_gap: int = 0) -> list[list[Hashable]]:
+        """
+        Keys grouped into runs of intervals that overlap or are at most
+        max_gap apart, each run in start order. Merging each run gives the
+        fewest spans that cover everything with no gap over max_gap.
+        """
+        groups: list[list[Hashable]] = []
+        reach = None
+        for i in range(len(self)):
+            if reach is None or self._starts[i] - reach > max_gap:
+                groups.append([])
+                reach = self._ends[i]
+            groups[-1].append(self._keys[i])
+            reach = max(reach, self._ends[i])
+        return groups
@@ -0,0 +1,157 @@
+"""On-disk journal of in-flight downloads so interrupted jobs can be resumed."""
+import json
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+from .logger import get_logger
+from .paths import get_app_data_dir
+from .segment_store import Segment
+from .store import SqliteStore
+
+logger = get_logger(__name__)
+
+# Progress is written at most this often per job; yt-dlp reports every chunk
+PROGRESS_WRITE_INTERVAL = 2.0
+MAX_RESUME_ATTEMPTS = 3
+
+
+@dataclass
+class JournalEntry:
+    id: str
+    url: str
+    selector: Optional[str] = None
+    format_id: Optional[str] = None
+    expected_path: Optional[Path] = None
+    # The segments asked for by a section download; empty for whole videos
+    sections: list[Segment] = field(default_factory=list)
+    part_files: list[str] = field(default_factory=list)
+    downloaded_bytes: int = 0
+    total_bytes: int = 0
+    status: str = "running"
+    attempts: int = 1
+    error: Optional[str] = None
+
+
+class JobJournal(SqliteStore):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            selector TEXT,
+            format_id TEXT,
+            expected_path TEXT,
+            sections TEXT NOT NULL DEFAULT '[]',
+            part_files TEXT NOT NULL DEFAULT '[]',
+            downloaded_bytes INTEGER NOT NULL DEFAULT 0,
+            total_bytes INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 1,
+            error TEXT,
+            updated_at REAL NOT NULL
+        );
+    """
+    
+    def __init__(self, path: Optional[Path] = None):
+        super().__init__(path or get_app_data_dir() / "jobs.db")
+        self._last_write: dict[str, float] = {}
+        self._write_lock = threading.Lock()
+    
+    def start(
+        self,
+        url: str,
+        selector: Optional[str] = None,
+        sections: Optional[list[Segment]] = None
+    ) -> JournalEntry:
+        entry = JournalEntry(id=uuid.uuid4().hex, url=url, selector=selector, sections=list(sections or ()))
+        self._execute(
+            "INSERT INTO jobs (id, url, selector, sections, status, updated_at) VALUES (?, ?, ?, ?, 'running', ?)",
+            (entry.id, url, selector, json.dumps([[s.name, s.start_ms, s.end_ms] for s in entry.sections]), time.time())
+        )
+        return entry
+    
+    def resume(self, entry: JournalEntry) -> JournalEntry:
+        entry.attempts += 1
+        entry.status = "running"
+        self._execute(
+            "UPDATE jobs SET status = 'running', attempts = ?, error = NULL, updated_at = ? WHERE id = ?",
+            (entry.attempts, time.time(), entry.id)
+        )
+        return entry
+    
+    def plan(self, entry: JournalEntry, format_id: str, expected_path: Path):
+        """Pin the formats picked for this job so a resume fetches the exact same streams."""
+        entry.format_id = format_id
+        entry.expected_path = expected_path
+        self._execute(
+            "UPDATE jobs SET format_id = ?, expected_path = ?, updated_at = ? WHERE id = ?",
+            (format_id, str(expected_path), time.time(), entry.id)
+        )
+    
+    def progress(self, entry: JournalEntry, part_file: Optional[str], downloaded: int, total: int):
+        entry.downloaded_bytes = downloaded
+        entry.total_bytes = total
+        new_part = bool(part_file) and part_file not in entry.part_files
+        if new_part:
+            entry.part_files.append(part_file)
+        
+        now = time.monotonic()
+        with self._write_lock:
+            if not new_part and now - self._last_write.get(entry.id, 0) < PROGRESS_WRITE_INTERVAL:
+                return
+            self._last_write[entry.id] = now
+        self._execute(
+            "UPDATE jobs SET part_files = ?, downloaded_bytes = ?, total_bytes = ?, updated_at = ? WHERE id = ?",
+            (json.dumps(entry.part_files), downloaded, total, time.time(), entry.id)
+        )
+    
+    def finish(self, entry: JournalEntry):
+        with self._write_lock:
+            self._last_write.pop(entry.id, None)
+        self._execute("DELETE FROM jobs WHERE id = ?", (entry.id,))
+    
+    def fail(self, entry: JournalEntry, error: str):
+        entry.status = "failed"
+        entry.error = error
+        with self._write_lock:
+            self._last_write.pop(entry.id, None)
+        self._execute(
+            "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+            (error, time.time(), entry.id)
+        )
+    
+    def unfinished(self) -> list[JournalEntry]:
+        """
+        Jobs worth resuming: anything still marked running (the app exited
+        mid-download) and failed jobs that left partial data behind, up to
+        MAX_RESUME_ATTEMPTS tries each.
+        """
+        rows = self._query(
+            "SELECT * FROM jobs WHERE attempts < ? AND "
+            "(status = 'running' OR (status = 'failed' AND downloaded_bytes > 0)) "
+            "ORDER BY updated_at",
+            (MAX_RESUME_ATTEMPTS,)
+        )
+        return [
+            JournalEntry(
+                id=row["id"], url=row["url"], selector=row["selector"], format_id=row["format_id"],
+                expected_path=Path(row["expected_path"]) if row["expected_path"] else None,
+                sections=[Segment(name, start, end) for name, start, end in json.loads(row["sections"])],
+                part_files=json.loads(row["part_files"]),
+                downloaded_bytes=row["downloaded_bytes"], total_bytes=row["total_bytes"],
+                status=row["status"], attempts=row["attempts"], error=row["error"],
+            )
+            for row in rows
+        ]
+    
+    def prune(self) -> int:
+        """Forget failed jobs that have used up their resume attempts."""
+        return self._execute(
+            "DELETE FROM jobs WHERE status = 'failed' AND attempts >= ?", (MAX_RESUME_ATTEMPTS,)
+        )
+    
+    def discard(self, entry: JournalEntry):
+        self._execute("DELETE FROM jobs WHERE id = ?", (entry.id,))
+        logger.info(f"Discarded journal entry {entry.id} for {entry.url}")
@@ -0,0 +1,267 @@
+"""ffprobe results for local media files, cached by path, size and mtime."""
+import bisect
+import json
+import subprocess
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+from .logger import get_logger
+from .paths import get_cache_dir
+from .store import SqliteStore
+
+logger = get_logger(__name__)
+
+# Parsed results kept in memory on top of the on-disk cache
+MEMORY_CACHE_SIZE = 32
+
+
+class MediaProbeError(RuntimeError):
+    pass
+
+
+@dataclass
+class StreamInfo:
+    index: int
+    codec_type: str
+    codec_name: str = ""
+    profile: Optional[str] = None
+    duration_ms: Optional[int] = None
+    # Video
+    width: Optional[int] = None
+    height: Optional[int] = None
+    pix_fmt: Optional[str] = None
+    frame_rate: Optional[float] = None
+    # Audio
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    channel_layout: Optional[str] = None
+
+    @classmethod
+    def from_ffprobe(cls, stream: dict) -> "StreamInfo":
+        return cls(
+            index=stream.get("index", 0),
+            codec_type=stream.get("codec_type", ""),
+            codec_name=stream.get("codec_name", ""),
+            profile=stream.get("profile"),
+            duration_ms=_seconds_to_ms(stream.get("duration")),
+            width=stream.get("width"),
+            height=stream.get("height"),
+            pix_fmt=stream.get("pix_fmt"),
+            frame_rate=_parse_rate(stream.get("avg_frame_rate") or stream.get("r_frame_rate")),
+            sample_rate=int(stream["sample_rate"]) if stream.get("sample_rate") else None,
+            channels=stream.get("channels"),
+            channel_layout=stream.get("channel_layout"),
+        )
+
+
+@dataclass
+class MediaInfo:
+    path: Path
+    size: int
+    mtime_ns: int
+    duration_ms: int
+    format_name: str = ""
+    streams: list[StreamInfo] = field(default_factory=list)
+    # Presentation times of the first video stream's keyframes, ascending;
+    # None until a keyframe scan has been done
+    keyframes_ms: Optional[list[int]] = None
+
+    @property
+    def video(self) -> Optional[StreamInfo]:
+        return next((s for s in self.streams if s.codec_type == "video"), None)
+
+    @property
+    def audio(self) -> Optional[StreamInfo]:
+        return next((s for s in self.streams if s.codec_type == "audio"), None)
+
+    @property
+    def has_video(self) -> bool:
+        return self.video is not None
+
+    @property
+    def has_audio(self) -> bool:
+        return self.audio is not None
+
+    def keyframes_between(self, start_ms: int, end_ms: int) -> list[int]:
+        keyframes = self.keyframes_ms or []
+        lo = bisect.bisect_left(keyframes, start_ms)
+        hi = bisect.bisect_right(keyframes, end_ms)
+        return keyframes[lo:hi]
+
+    def keyframe_before(self, ms: int) -> Optional[int]:
+        """Latest keyframe at or before ms: where a seek to ms actually starts decoding."""
+        keyframes = self.keyframes_ms or []
+        i = bisect.bisect_right(keyframes, ms)
+        return keyframes[i - 1] if i else None
+
+
+def _seconds_to_ms(value) -> Optional[int]:
+    try:
+        return int(float(value) * 1000)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_rate(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    num, _, den = value.partition("/")
+    try:
+        rate = float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return rate or None
+
+
+class MediaInfoStore(SqliteStore):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS media (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            info TEXT NOT NULL,
+            keyframes TEXT,
+            probed_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        super().__init__(path or get_cache_dir() / "media_info.db")
+
+    def get(self, path: Path, size: int, mtime_ns: int) -> Optional[MediaInfo]:
+        rows = self._query(
+            "SELECT info, keyframes FROM media WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (str(path), size, mtime_ns)
+        )
+        if not rows:
+            return None
+        try:
+            record = json.loads(rows[0]["info"])
+            streams = [StreamInfo(**s) for s in record.pop("streams")]
+            keyframes = json.loads(rows[0]["keyframes"]) if rows[0]["keyframes"] else None
+            return MediaInfo(path=path, streams=streams, keyframes_ms=keyframes, **record)
+        except (TypeError, ValueError, KeyError) as e:
+            logger.warning(f"Discarding unreadable media info for {path}: {e}")
+            self._execute("DELETE FROM media WHERE path = ?", (str(path),))
+            return None
+
+    def put(self, info: MediaInfo):
+        record = {
+            "size": info.size,
+            "mtime_ns": info.mtime_ns,
+            "duration_ms": info.duration_ms,
+            "format_name": info.format_name,
+            "streams": [asdict(s) for s in info.streams],
+        }
+        keyframes = json.dumps(info.keyframes_ms) if info.keyframes_ms is not None else None
+        self._execute(
+            "INSERT OR REPLACE INTO media (path, size, mtime_ns, info, keyframes, probed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (str(info.path), info.size, info.mtime_ns, json.dumps(record), keyframes, time.time())
+        )
+
+    def purge_missing(self) -> int:
+        """Forget files that no longer exist."""
+        gone = [row["path"] for row in self._query("SELECT path FROM media") if not Path(row["path"]).exists()]
+        for path in gone:
+            self._execute("DELETE FROM media WHERE path = ?", (path,))
+        if gone:
+            logger.info(f"Purged {len(gone)} media info records for missing files")
+        return len(gone)
+
+
+class MediaProber:
+    """
+    Stream layout and duration come from one quick header probe. The
+    keyframe index needs a scan of every video packet (no decoding, but the
+    whole file is read), so it is only done when asked for and then cached
+    alongside the rest.
+    """
+
+    def __init__(self, ffprobe_path: str, store: Optional[MediaInfoStore] = None):
+        self.ffprobe_path = ffprobe_path
+        self.store = store
+        self._memory: dict[Path, MediaInfo] = {}
+        self._lock = threading.Lock()
+
+    def probe(self, path: Path, keyframes: bool = False) -> MediaInfo:
+        path = Path(path).resolve()
+        try:
+            stat = path.stat()
+        except OSError as e:
+            raise MediaProbeError(f"Cannot read {path}: {e}")
+
+        info = self._cached(path, stat.st_size, stat.st_mtime_ns)
+        if info is None:
+            info = self._probe_streams(path, stat.st_size, stat.st_mtime_ns)
+            self._remember(info)
+        if keyframes and info.keyframes_ms is None:
+            info.keyframes_ms = self._probe_keyframes(path) if info.has_video else []
+            self._remember(info)
+        return info
+
+    def _cached(self, path: Path, size: int, mtime_ns: int) -> Optional[MediaInfo]:
+        with self._lock:
+            info = self._memory.get(path)
+        if info and info.size == size and info.mtime_ns == mtime_ns:
+            return info
+        info = self.store.get(path, size, mtime_ns) if self.store else None
+        if info:
+            with self._lock:
+                self._memory[path] = info
+        return info
+
+    def _remember(self, info: MediaInfo):
+        with self._lock:
+            self._memory.pop(info.path, None)
+            self._memory[info.path] = info
+            while len(self._memory) > MEMORY_CACHE_SIZE:
+                self._memory.pop(next(iter(self._memory)))
+        if self.store:
+            self.store.put(info)
+
+    def _probe_streams(self, path: Path, size: int, mtime_ns: int) -> MediaInfo:
+        result = self._run([
+            self.ffprobe_path, "-v", "error", "-show_format", "-show_streams", "-of", "json", str(path)
+        ])
+        try:
+            data = json.loads(result.stdout or "{}")
+        except ValueError as e:
+            raise MediaProbeError(f"Unreadable ffprobe output for {path}: {e}")
+        fmt = data.get("format") or {}
+        streams = [StreamInfo.from_ffprobe(s) for s in data.get("streams") or []]
+        duration_ms = _seconds_to_ms(fmt.get("duration"))
+        if duration_ms is None:
+            duration_ms = max((s.duration_ms or 0 for s in streams), default=0)
+        logger.debug(f"Probed {path.name}: {duration_ms}ms, {[s.codec_name for s in streams]}")
+        return MediaInfo(
+            path=path, size=size, mtime_ns=mtime_ns, duration_ms=duration_ms,
+            format_name=fmt.get("format_name", ""), streams=streams,
+        )
+
+    def _probe_keyframes(self, path: Path) -> list[int]:
+        started = time.monotonic()
+        result = self._run([
+            self.ffprobe_path, "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", str(path)
+        ])
+        keyframes = []
+        for line in result.stdout.splitlines():
+            pts_time, _, flags = line.partition(",")
+            if "K" in flags and pts_time not in ("", "N/A"):
+                keyframes.append(int(round(float(pts_time) * 1000)))
+        keyframes.sort()
+        logger.info(f"Indexed {len(keyframes)} keyframes of {path.name} in {time.monotonic() - started:.1f}s")
+        return keyframes
+
+    def _run(self, cmd: list[str]) -> subprocess.CompletedProcess:
+        logger.debug(f"Running: {' '.join(cmd)}")
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True)
+        except OSError as e:
+            raise MediaProbeError(f"Could not run ffprobe: {e}")
+        if result.returncode != 0:
+            raise MediaProbeError(f"ffprobe failed: {result.stderr}")
+        return result
@@ -1,14 +1,41 @@
-import subprocess
 import shutil
 import sys
 import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Optional
+from enum import Enum
+from typing import Callable, Optional
+from .ffmpeg_runner import (
+    DEFAULT_STALL_TIMEOUT, FFmpegCancelled, FFmpegError, FFmpegProgress, FFmpegRunner, FFmpegTimeout
+)
+from .analysis import MediaAnalyzer
+from .concat import Concatenator
+from .export_cache import ExportCache
+from .filmstrip import FilmstripBuilder
+from .interval_index import IntervalIndex
 from .logger import get_logger
+from .media_info import MediaInfo, MediaInfoStore, MediaProbeError, MediaProber
+from .multi_export import PASS_OVERHEAD_MS, ExportPass, MultiOutputExporter, pass_saving_ms, plan_passes
+from .pcm_cache import PcmCache
+from .progress import Progress, ProgressAggregator
+from .segment_store import Segment
+from .smart_cut import SmartCutter, SmartCutUnavailable
+from .waveform import WaveformBuilder
 
 logger = get_logger(__name__)
 
+# ffmpeg processes run at once by export_segments; the CPU thread budget is split between them
+DEFAULT_EXPORT_WORKERS = 4
+# Audio-only exports decode the whole track into the PCM cache when the
+# per-segment passes would decode at least this share of it anyway
+PCM_CACHE_MIN_SHARE = 0.5
+# Part of every export cache key; bump it when the encoder settings below
+# change so exports made with the old ones are redone
+EXPORT_SETTINGS_VERSION = 1
+
 
 def get_bundled_path() -> Path:
     """Get the path to bundled resources (for PyInstaller builds)."""
@@ -21,15 +48,54 @@ def get_bundled_path() -> Path:
 
 
 @dataclass
-class Segment:
-    name: str
-    start_ms: int
-    end_ms: int
+class SegmentResult:
+    segment: Segment
+    output: Optional[Path] = None
+    error: Optional[str] = None
+
+
+class ExportError(RuntimeError):
+    """Raised by export_segments when some segments failed; the rest were still exported."""
+    
+    def __init__(self, results: list[SegmentResult]):
+        self.results = results
+        self.outputs = [r.output for r in results if r.output]
+        self.failures = [r for r in results if r.error]
+        # ffmpeg errors end with the relevant line; the full stderr is in the log
+        details = "\n".join(f"{r.segment.name}: {r.error.strip().splitlines()[-1]}" for r in self.failures)
+        super().__init__(f"{len(self.failures)} of {len(results)} segments failed:\n{details}")
+
+
+class ExportMode(Enum):
+    REENCODE = "reencode"
+    # Stream-copy whole GOPs, re-encode only the partial GOPs at the cut points
+    SMART_CUT = "smart_cut"
 
 
 class MediaProcessor:
-    def __init__(self):
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_EXPORT_WORKERS,
+        cpu_threads: Optional[int] = None,
+        timeout: Optional[float] = None,
+        stall_timeout: Optional[float] = DEFAULT_STALL_TIMEOUT,
+        media_info_store: Optional[MediaInfoStore] = None
+    ):
+        self.max_workers = max(1, max_workers)
+        self.cpu_threads = max(1, cpu_threads or os.cpu_count() or 1)
         self.ffmpeg_path = self._find_ffmpeg()
+        self.ffprobe_path = self.ffmpeg_path.replace("ffmpeg", "ffprobe")
+        # timeout bounds each ffmpeg run; stall_timeout kills runs that stop reporting progress
+        self.runner = FFmpegRunner(timeout, stall_timeout)
+        self.prober = MediaProber(self.ffprobe_path, media_info_store or MediaInfoStore())
+        self.smart_cutter = SmartCutter(self.ffmpeg_path, self.prober, self.runner)
+        self.multi_exporter = MultiOutputExporter(self.ffmpeg_path, self.runner)
+        self.pcm_cache = PcmCache(self.ffmpeg_path, self.runner)
+        self.export_cache = ExportCache()
+        self.concatenator = Concatenator(self.ffmpeg_path, self.prober, self.runner)
+        self.waveforms = WaveformBuilder(self.ffmpeg_path, self.runner)
+        self.filmstrips = FilmstripBuilder(self.ffmpeg_path, self.runner)
+        self.analyzer = MediaAnalyzer(self.ffmpeg_path, self.pcm_cache, self.runner)
         logger.info(f"MediaProcessor initialized. FFmpeg path: {self.ffmpeg_path}")
     
     def _find_ffmpeg(self) -> str:
@@ -81,25 +147,31 @@ class MediaProcessor:
             logger.error(f"File not found: {file_path}")
             raise FileNotFoundError(f"File not found: {file_path}")
         
-        ffprobe = self.ffmpeg_path.replace("ffmpeg", "ffprobe")
-        cmd = [
-            ffprobe, "-v", "quiet", "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1", str(file_path)
-        ]
-        logger.debug(f"Running: {' '.join(cmd)}")
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            logger.error(f"ffprobe error: {result.stderr}")
-            raise RuntimeError(f"ffprobe failed: {result.stderr}")
-        
         try:
-            duration_ms = int(float(result.stdout.strip()) * 1000)
-            logger.debug(f"Duration: {duration_ms}ms")
-            return duration_ms
-        except ValueError as e:
-            logger.error(f"Failed to parse duration output: {result.stdout}")
+            duration_ms = self.get_media_info(file_path).duration_ms
+        except MediaProbeError as e:
+            logger.error(f"ffprobe error: {e}")
             raise
+        logger.debug(f"Duration: {duration_ms}ms")
+        return duration_ms
+    
+    def get_media_info(self, file_path: Path, keyframes: bool = False) -> MediaInfo:
+        """Streams and duration of file_path, plus its keyframe index if asked; cached across runs."""
+        return self.prober.probe(file_path, keyframes)
+    
+    def has_video_stream(self, file_path: Path) -> bool:
+        return self._has_stream(file_path, "video")
+    
+    def has_audio_stream(self, file_path: Path) -> bool:
+        return self._has_stream(file_path, "audio")
+    
+    def _has_stream(self, file_path: Path, codec_type: str) -> bool:
+        try:
+            info = self.get_media_info(file_path)
+        except MediaProbeError as e:
+            logger.warning(f"ffprobe could not inspect streams of {file_path}: {e}")
+            return True
+        return any(s.codec_type == codec_type for s in info.streams)
     
     def export_video(
         self,
@@ -107,7 +179,9 @@ class MediaProcessor:
         output: Path,
         start_ms: int,
         end_ms: int,
-        progress_callback: Optional[callable] = None
+        progress_callback: Optional[Callable[[FFmpegProgress], None]] = None,
+        threads: Optional[int] = None,
+        cancel: Optional[threading.Event] = None
     ) -> Path:
         logger.info(f"Exporting video: {output.name} ({start_ms}ms - {end_ms}ms)")
         
@@ -123,28 +197,64 @@ class MediaProcessor:
             "-t", self._ms_to_timestamp(end_ms - start_ms),
             "-c:v", "libx264", "-preset", "fast",
             "-c:a", "aac",
-            str(output)
         ]
-        logger.debug(f"FFmpeg command: {' '.join(cmd)}")
+        if threads:
+            cmd += ["-threads", str(threads)]
+        cmd.append(str(output))
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-            if result.returncode != 0:
-                logger.error(f"FFmpeg error: {result.stderr}")
-                raise RuntimeError(f"Video export failed: {result.stderr}")
+            self.runner.run(cmd, progress_callback, cancel, outputs=[output])
             logger.info(f"Video exported successfully: {output}")
             return output
+        except FFmpegError as e:
+            logger.error(f"FFmpeg error: {e.stderr}")
+            raise RuntimeError(f"Video export failed: {e}\n{e.stderr}") from e
+        except FFmpegCancelled:
+            logger.info(f"Video export cancelled: {output.name}")
+            raise
         except Exception as e:
             logger.error(f"Video export failed: {e}", exc_info=True)
             raise
     
+    def smart_cut_video(
+        self,
+        source: Path,
+        output: Path,
+        start_ms: int,
+        end_ms: int,
+        progress_callback: Optional[Callable[[FFmpegProgress], None]] = None,
+        threads: Optional[int] = None,
+        cancel: Optional[threading.Event] = None
+    ) -> Path:
+        """Frame-accurate cut that only re-encodes around the cut points; falls back to export_video."""
+        logger.info(f"Smart-cutting video: {output.name} ({start_ms}ms - {end_ms}ms)")
+        
+        if not source.exists():
+            logger.error(f"Source file not found: {source}")
+            raise FileNotFoundError(f"Source file not found: {source}")
+        
+        output.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self.smart_cutter.cut(source, output, start_ms, end_ms, threads, progress_callback, cancel)
+            logger.info(f"Video smart-cut successfully: {output}")
+            return output
+        except SmartCutUnavailable as e:
+            logger.info(f"Smart cut not possible for {output.name} ({e}), re-encoding")
+        except FFmpegTimeout:
+            raise
+        except RuntimeError as e:
+            logger.warning(f"Smart cut failed for {output.name}, re-encoding: {e}")
+        return self.export_video(source, output, start_ms, end_ms, progress_callback, threads, cancel)
+    
     def export_audio(
         self,
         source: Path,
         output: Path,
         start_ms: int,
         end_ms: int,
-        progress_callback: Optional[callable] = None
+        progress_callback: Optional[Callable[[FFmpegProgress], None]] = None,
+        threads: Optional[int] = None,
+        cancel: Optional[threading.Event] = None
     ) -> Path:
         logger.info(f"Exporting audio: {output.name} ({start_ms}ms - {end_ms}ms)")
         
@@ -163,17 +273,21 @@ class MediaProcessor:
             "-acodec", "pcm_s16le",
             "-ar", "44100",
             "-ac", "2",
-            str(wav_output)
         ]
-        logger.debug(f"FFmpeg command: {' '.join(cmd)}")
+        if threads:
+            cmd += ["-threads", str(threads)]
+        cmd.append(str(wav_output))
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-            if result.returncode != 0:
-                logger.error(f"FFmpeg error: {result.stderr}")
-                raise RuntimeError(f"Audio export failed: {result.stderr}")
+            self.runner.run(cmd, progress_callback, cancel, outputs=[wav_output])
             logger.info(f"Audio exported successfully: {wav_output}")
             return wav_output
+        except FFmpegError as e:
+            logger.error(f"FFmpeg error: {e.stderr}")
+            raise RuntimeError(f"Audio export failed: {e}\n{e.stderr}") from e
+        except FFmpegCancelled:
+            logger.info(f"Audio export cancelled: {wav_output.name}")
+            raise
         except Exception as e:
             logger.error(f"Audio export failed: {e}", exc_info=True)
             raise
@@ -184,29 +298,365 @@ class MediaProcessor:
         output_dir: Path,
         segments: list[Segment],
         audio_only: bool = False,
-        progress_callback: Optional[callable] = None
+        progress_callback: Optional[Callable[[Progress], None]] = None,
+        mode: ExportMode = ExportMode.REENCODE,
+        cancel: Optional[threading.Event] = None,
+        join_name: Optional[str] = None
     ) -> list[Path]:
-        logger.info(f"Exporting {len(segments)} segments (audio_only={audio_only})")
+        """
+        Export segments in parallel. Re-encoded segments that overlap or sit
+        close together are cut from a single decode (see plan_passes). A
+        failing segment doesn't stop the others; if any failed, ExportError
+        is raised once all are done and carries both the outputs and the
+        per-segment errors. Setting cancel kills the running ffmpeg
+        processes and raises FFmpegCancelled.
+        
+        Progress done/total are in milliseconds of media exported, so rate is
+        the combined export speed and eta is the time left.
+        
+        Segments whose source, range and settings match an earlier export
+        are taken from the export cache without encoding.
+        
+        With join_name, the segments are exported to a scratch folder and
+        then joined, in order, into output_dir/join_name; that one file is
+        returned.
+        
+        Raises ValueError, before exporting anything, if a segment ends at
+        or before its start.
+        """
+        self._check_segments(segments)
+        if not audio_only and not self.has_video_stream(source):
+            logger.info(f"{source.name} has no video stream, exporting audio only")
+            audio_only = True
         output_dir.mkdir(parents=True, exist_ok=True)
-        outputs = []
+        progress = ProgressAggregator(progress_callback)
+        if join_name is None:
+            outputs = self._export_each(source, output_dir, segments, audio_only, mode, progress, cancel)
+        else:
+            with tempfile.TemporaryDirectory(prefix="join-", dir=output_dir) as tmp:
+                pieces = self._export_each(source, Path(tmp), segments, audio_only, mode, progress, cancel)
+                ext = ".wav" if audio_only else ".mp4"
+                total_ms = sum(seg.end_ms - seg.start_ms for seg in segments)
+                output = output_dir / f"{join_name}{ext}"
+                outputs = [self._join(source, pieces, output, total_ms, audio_only, progress, cancel)]
+        
+        progress.finish()
+        logger.info(f"Successfully exported {len(segments)} segments")
+        return outputs
+    
+    def _check_segments(self, segments: list[Segment]):
+        index = IntervalIndex((seg.start_ms, seg.end_ms, i) for i, seg in enumerate(segments))
+        empty = sorted(index.empty())
+        if empty:
+            names = ", ".join(segments[i].name for i in empty)
+            raise ValueError(f"Segments with no length: {names}")
+        overlaps = index.overlaps()
+        if overlaps:
+            # Allowed (the overlap is decoded once), but usually a mistake
+            a, b = overlaps[0]
+            logger.warning(
+                f"{len(overlaps)} pairs of segments overlap, e.g. {segments[a].name} and {segments[b].name}"
+            )
+    
+    def _export_each(
+        self,
+        source: Path,
+        output_dir: Path,
+        segments: list[Segment],
+        audio_only: bool,
+        mode: ExportMode,
+        progress: ProgressAggregator,
+        cancel: Optional[threading.Event]
+    ) -> list[Path]:
+        ext = ".wav" if audio_only else ".mp4"
+        outputs = self._output_paths(output_dir, segments, ext)
+        tracker = _ExportTracker(progress, segments)
+        keys = self._cache_keys(source, segments, audio_only, mode)
         
+        reused = {}
         for i, seg in enumerate(segments):
-            logger.debug(f"Exporting segment {i+1}/{len(segments)}: {seg.name}")
-            if progress_callback:
-                progress_callback((i + 1) / len(segments), f"Exporting: {seg.name}")
-            
-            ext = ".wav" if audio_only else ".mp4"
-            output_path = output_dir / f"{seg.name}{ext}"
-            
+            if keys[i] and self.export_cache.fetch(keys[i], outputs[i]):
+                reused[i] = SegmentResult(seg, output=outputs[i])
+        if reused:
+            tracker.reused(reused)
+        pending = [i for i in range(len(segments)) if i not in reused]
+        for i in pending:
+            # The output may be a hardlink into the export cache from an earlier run
+            outputs[i].unlink(missing_ok=True)
+        
+        spans = [(seg.start_ms, seg.end_ms) for seg in segments]
+        if audio_only or mode is ExportMode.REENCODE:
+            passes = plan_passes([spans[i] for i in pending])
+            for export_pass in passes:
+                export_pass.indices = [pending[j] for j in export_pass.indices]
+        else:
+            # Smart cuts mostly copy packets; there is no shared decode to save
+            passes = [ExportPass(*spans[i], [i]) for i in pending]
+        with_audio = audio_only or all(len(p.indices) == 1 for p in passes) or self.has_audio_stream(source)
+        workers, threads = self._export_budget(len(passes))
+        logger.info(
+            f"Exporting {len(pending)} segments in {len(passes)} passes, {len(reused)} unchanged "
+            f"(audio_only={audio_only}, mode={mode.value}, workers={workers}, threads={threads})"
+        )
+        
+        pcm = self._decoded_audio(source, passes, tracker, cancel) if audio_only and passes else None
+        if pcm:
+            for i in pending:
+                tracker.finished(i, self._slice_segment(pcm, outputs[i], segments[i], cancel))
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export") as pool:
+                futures = [
+                    pool.submit(
+                        self._export_pass, source, export_pass, segments, outputs,
+                        audio_only, mode, with_audio, threads, tracker, cancel
+                    )
+                    for export_pass in passes
+                ]
+                for future in as_completed(futures):
+                    future.result()
+        
+        ordered = tracker.results()
+        for i in pending:
+            if keys[i] and ordered[i].output:
+                self.export_cache.store(keys[i], ordered[i].output)
+        exported = sum(1 for r in ordered if r.output)
+        if cancel is not None and cancel.is_set():
+            tracker.progress.finish(status=f"Export cancelled ({exported} of {len(segments)} segments done)")
+            logger.info(f"Export cancelled after {exported} of {len(segments)} segments")
+            raise FFmpegCancelled(f"Export cancelled after {exported} of {len(segments)} segments")
+        if any(r.error for r in ordered):
+            error = ExportError(ordered)
+            tracker.progress.finish(status=f"Exported {exported} of {len(segments)} segments")
+            logger.error(str(error))
+            raise error
+        return [r.output for r in ordered]
+    
+    def _join(
+        self,
+        source: Path,
+        pieces: list[Path],
+        output: Path,
+        total_ms: int,
+        audio_only: bool,
+        progress: ProgressAggregator,
+        cancel: Optional[threading.Event]
+    ) -> Path:
+        with_audio = audio_only or self.has_audio_stream(source)
+        progress.update(status=f"Joining {len(pieces)} segments...", fraction=0.0)
+        try:
+            return self.concatenator.join(
+                pieces, output, audio_only, with_audio, self.cpu_threads,
+                lambda p: progress.update(fraction=p.out_time_ms / total_ms if total_ms else 0.0),
+                cancel
+            )
+        except FFmpegCancelled:
+            progress.finish(status="Export cancelled")
+            logger.info(f"Join cancelled: {output.name}")
+            raise
+    
+    def _decoded_audio(
+        self,
+        source: Path,
+        passes: list[ExportPass],
+        tracker: "_ExportTracker",
+        cancel: Optional[threading.Event]
+    ) -> Optional[Path]:
+        """
+        The source's audio from the PCM cache, decoding it first if that is
+        cheaper than the planned passes. None means export pass by pass.
+        """
+        cached = self.pcm_cache.lookup(source)
+        if cached:
+            logger.info(f"Slicing audio segments from cached decode of {source.name}")
+            return cached
+        try:
+            duration_ms = self.get_duration_ms(source)
+        except (OSError, RuntimeError) as e:
+            logger.warning(f"Not using the PCM cache, duration unknown: {e}")
+            return None
+        pass_cost = sum(PASS_OVERHEAD_MS + p.span_ms for p in passes)
+        if duration_ms <= 0 or pass_cost < duration_ms * PCM_CACHE_MIN_SHARE:
+            return None
+        
+        everything = [i for p in passes for i in p.indices]
+        tracker.started(everything)
+        try:
+            # The decode is the bulk of the work; slicing afterwards is near instant
+            return self.pcm_cache.decode(
+                source, lambda p: tracker.advance(everything, p.out_time_ms / duration_ms), cancel
+            )
+        except FFmpegCancelled:
+            return None
+        except Exception as e:
+            logger.warning(f"Audio decode failed, exporting segments one by one: {e}")
+            tracker.advance(everything, 0.0)
+            return None
+    
+    def _cache_keys(
+        self,
+        source: Path,
+        segments: list[Segment],
+        audio_only: bool,
+        mode: ExportMode
+    ) -> list[Optional[str]]:
+        settings = f"{EXPORT_SETTINGS_VERSION}:{'wav' if audio_only else mode.value}"
+        try:
+            return [self.export_cache.key(source, seg.start_ms, seg.end_ms, settings) for seg in segments]
+        except OSError as e:
+            logger.warning(f"Export cache unavailable for {source}: {e}")
+            return [None] * len(segments)
+    
+    def _slice_segment(
+        self,
+        pcm: Path,
+        output: Path,
+        seg: Segment,
+        cancel: Optional[threading.Event]
+    ) -> SegmentResult:
+        if cancel is not None and cancel.is_set():
+            return SegmentResult(seg, error="Cancelled")
+        try:
+            output = self.pcm_cache.write_wav(pcm, output, seg.start_ms, seg.end_ms)
+            logger.info(f"Audio exported successfully: {output}")
+            return SegmentResult(seg, output=output)
+        except Exception as e:
+            logger.error(f"Failed to export segment {seg.name}: {e}", exc_info=True)
+            return SegmentResult(seg, error=str(e))
+    
+    def _export_pass(
+        self,
+        source: Path,
+        export_pass: ExportPass,
+        segments: list[Segment],
+        outputs: list[Path],
+        audio_only: bool,
+        mode: ExportMode,
+        with_audio: bool,
+        threads: int,
+        tracker: "_ExportTracker",
+        cancel: Optional[threading.Event]
+    ):
+        spans = [(seg.start_ms, seg.end_ms) for seg in segments]
+        indices = export_pass.indices
+        if len(indices) > 1 and pass_saving_ms(spans, export_pass) > 0:
+            longest = max(spans[i][1] - spans[i][0] for i in indices)
+            tracker.started(indices)
             try:
-                if audio_only:
-                    self.export_audio(source, output_path, seg.start_ms, seg.end_ms)
-                else:
-                    self.export_video(source, output_path, seg.start_ms, seg.end_ms)
-                outputs.append(output_path)
+                self.multi_exporter.export(
+                    source, export_pass, spans, outputs, audio_only, with_audio, threads,
+                    lambda p: tracker.advance(indices, p.out_time_ms / longest if longest else 1.0),
+                    cancel
+                )
+                for i in indices:
+                    tracker.finished(i, SegmentResult(segments[i], output=outputs[i]))
+                return
+            except FFmpegCancelled:
+                for i in indices:
+                    tracker.finished(i, SegmentResult(segments[i], error="Cancelled"))
+                return
             except Exception as e:
-                logger.error(f"Failed to export segment {seg.name}: {e}", exc_info=True)
-                raise
+                logger.warning(f"Single-pass export failed, exporting those segments one by one: {e}")
+        for i in indices:
+            result = self._export_segment(
+                source, outputs[i], i, segments[i], audio_only, mode, threads, tracker, cancel
+            )
+            tracker.finished(i, result)
+    
+    def _export_segment(
+        self,
+        source: Path,
+        output: Path,
+        index: int,
+        seg: Segment,
+        audio_only: bool,
+        mode: ExportMode,
+        threads: int,
+        tracker: "_ExportTracker",
+        cancel: Optional[threading.Event]
+    ) -> SegmentResult:
+        if cancel is not None and cancel.is_set():
+            return SegmentResult(seg, error="Cancelled")
+        logger.debug(f"Exporting segment: {seg.name}")
+        tracker.started([index])
+        duration = seg.end_ms - seg.start_ms
         
-        logger.info(f"Successfully exported {len(outputs)} segments")
-        return outputs
+        def on_progress(p: FFmpegProgress):
+            tracker.advance([index], p.out_time_ms / duration if duration > 0 else 1.0)
+        
+        try:
+            if audio_only:
+                output = self.export_audio(source, output, seg.start_ms, seg.end_ms, on_progress, threads, cancel)
+            elif mode is ExportMode.SMART_CUT:
+                output = self.smart_cut_video(source, output, seg.start_ms, seg.end_ms, on_progress, threads, cancel)
+            else:
+                output = self.export_video(source, output, seg.start_ms, seg.end_ms, on_progress, threads, cancel)
+            return SegmentResult(seg, output=output)
+        except FFmpegCancelled:
+            return SegmentResult(seg, error="Cancelled")
+        except Exception as e:
+            logger.error(f"Failed to export segment {seg.name}: {e}", exc_info=True)
+            return SegmentResult(seg, error=str(e))
+    
+    def _export_budget(self, count: int) -> tuple[int, int]:
+        """How many ffmpeg processes to run at once, and -threads for each, so together they fit cpu_threads."""
+        workers = max(1, min(self.max_workers, count, self.cpu_threads))
+        return workers, max(1, self.cpu_threads // workers)
+    
+    def _output_paths(self, output_dir: Path, segments: list[Segment], ext: str) -> list[Path]:
+        # Segments are written concurrently, so two with the same name must not share a file
+        paths = []
+        taken = set()
+        for seg in segments:
+            name = seg.name
+            n = 2
+            while name.lower() in taken:
+                name = f"{seg.name} ({n})"
+                n += 1
+            taken.add(name.lower())
+            paths.append(output_dir / f"{name}{ext}")
+        return paths
+
+
+class _ExportTracker:
+    """Folds per-segment ffmpeg progress into one ProgressAggregator, in milliseconds of media."""
+    
+    def __init__(self, progress: ProgressAggregator, segments: list[Segment]):
+        self.progress = progress
+        self.segments = segments
+        self.durations = [max(seg.end_ms - seg.start_ms, 0) for seg in segments]
+        self.done = [0] * len(segments)
+        self._results: dict[int, SegmentResult] = {}
+        self._lock = threading.Lock()
+        progress.update(status=f"Exporting {len(segments)} segments...", done=0, total=sum(self.durations))
+    
+    def reused(self, results: dict[int, SegmentResult]):
+        """Segments served from the export cache; they drop out of the work left to do."""
+        with self._lock:
+            self._results.update(results)
+            for i in results:
+                self.durations[i] = 0
+            total = sum(self.durations)
+        self.progress.update(status=f"Reusing {len(results)} unchanged segments", done=0, total=total)
+    
+    def started(self, indices: list[int]):
+        names = ", ".join(self.segments[i].name for i in indices)
+        self.progress.update(status=f"Exporting: {names}")
+    
+    def advance(self, indices: list[int], fraction: float):
+        fraction = min(max(fraction, 0.0), 1.0)
+        with self._lock:
+            for i in indices:
+                self.done[i] = int(self.durations[i] * fraction)
+            done = sum(self.done)
+        self.progress.update(done=done)
+    
+    def finished(self, index: int, result: SegmentResult):
+        with self._lock:
+            self._results[index] = result
+            self.done[index] = self.durations[index]
+            done = sum(self.done)
+        verb = "Failed" if result.error else "Exported"
+        self.progress.update(status=f"{verb}: {result.segment.name}", done=done)
+    
+    def results(self) -> list[SegmentResult]:
+        return [self._results[i] for i in range(len(self.segments))]
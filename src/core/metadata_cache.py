@@ -0,0 +1,106 @@
+"""Persistent cache of compact video metadata records."""
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+from .logger import get_logger
+from .paths import get_cache_dir
+from .store import SqliteStore
+
+logger = get_logger(__name__)
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+MAX_THUMBNAILS = 4
+
+
+@dataclass
+class VideoMetadata:
+    video_id: str
+    title: str
+    duration: Optional[float] = None
+    uploader: Optional[str] = None
+    webpage_url: Optional[str] = None
+    chapters: list[dict] = field(default_factory=list)
+    format_ids: list[str] = field(default_factory=list)
+    thumbnails: list[dict] = field(default_factory=list)
+    fetched_at: float = field(default_factory=time.time)
+    
+    @property
+    def thumbnail(self) -> Optional[str]:
+        return self.thumbnails[0]["url"] if self.thumbnails else None
+    
+    @classmethod
+    def from_info(cls, video_id: str, info: dict) -> "VideoMetadata":
+        """Keep only what the app uses from a yt-dlp info dict; the format list is dropped."""
+        chapters = [
+            {"title": c.get("title", ""), "start_time": c.get("start_time"), "end_time": c.get("end_time")}
+            for c in info.get("chapters") or []
+        ]
+        
+        format_id = info.get("format_id") or ""
+        format_ids = [f for f in format_id.split("+") if f]
+        
+        # Largest thumbnails first; yt-dlp lists them in ascending preference
+        thumbs = [
+            {"url": t["url"], "width": t.get("width"), "height": t.get("height")}
+            for t in reversed(info.get("thumbnails") or []) if t.get("url")
+        ]
+        if not thumbs and info.get("thumbnail"):
+            thumbs = [{"url": info["thumbnail"], "width": None, "height": None}]
+        
+        return cls(
+            video_id=video_id,
+            title=info.get("title") or "",
+            duration=info.get("duration"),
+            uploader=info.get("uploader"),
+            webpage_url=info.get("webpage_url"),
+            chapters=chapters,
+            format_ids=format_ids,
+            thumbnails=thumbs[:MAX_THUMBNAILS],
+        )
+
+
+class MetadataCache(SqliteStore):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS metadata (
+            key TEXT PRIMARY KEY,
+            video_id TEXT NOT NULL,
+            record TEXT NOT NULL,
+            fetched_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS metadata_video_id ON metadata (video_id);
+    """
+    
+    def __init__(self, path: Optional[Path] = None, ttl: float = DEFAULT_TTL_SECONDS):
+        super().__init__(path or get_cache_dir() / "metadata.db")
+        self.ttl = ttl
+    
+    def get(self, key: str) -> Optional[VideoMetadata]:
+        rows = self._query(
+            "SELECT record FROM metadata WHERE key = ? AND fetched_at >= ?",
+            (key, time.time() - self.ttl)
+        )
+        if not rows:
+            return None
+        try:
+            return VideoMetadata(**json.loads(rows[0]["record"]))
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Discarding unreadable metadata record for {key}: {e}")
+            self._execute("DELETE FROM metadata WHERE key = ?", (key,))
+            return None
+    
+    def put(self, key: str, metadata: VideoMetadata):
+        self._execute(
+            "INSERT OR REPLACE INTO metadata (key, video_id, record, fetched_at) VALUES (?, ?, ?, ?)",
+            (key, metadata.video_id, json.dumps(asdict(metadata)), metadata.fetched_at)
+        )
+    
+    def invalidate(self, key: str):
+        self._execute("DELETE FROM metadata WHERE key = ? OR video_id = ?", (key, key))
+    
+    def purge_expired(self) -> int:
+        removed = self._execute("DELETE FROM metadata WHERE fetched_at < ?", (time.time() - self.ttl,))
+        if removed:
+            logger.info(f"Purged {removed} expired metadata records")
+        return removed
@@ -0,0 +1,135 @@
+"""
+Single-pass export: decode a stretch of the source once and cut several
+segments out of it with one ffmpeg process, instead of one seek + decode
+per segment.
+"""
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+from .ffmpeg_runner import FFmpegError, FFmpegProgress, FFmpegRunner
+from .interval_index import IntervalIndex
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# Fixed cost of a separate ffmpeg run, in milliseconds of decoded media:
+# process start, container open, and the accurate seek, which decodes from
+# the preceding keyframe (typically a few seconds of video)
+PASS_OVERHEAD_MS = 3000
+# Every output gets its own encoder inside the one process; past this many
+# the shared pass stops paying off against running passes in parallel
+MAX_OUTPUTS_PER_PASS = 8
+
+
+@dataclass
+class ExportPass:
+    start_ms: int
+    end_ms: int
+    # Positions in the span list handed to plan_passes
+    indices: list[int] = field(default_factory=list)
+    
+    @property
+    def span_ms(self) -> int:
+        return self.end_ms - self.start_ms
+
+
+def plan_passes(
+    spans: list[tuple[int, int]],
+    overhead_ms: int = PASS_OVERHEAD_MS,
+    max_outputs: int = MAX_OUTPUTS_PER_PASS
+) -> list[ExportPass]:
+    """
+    Group (start_ms, end_ms) spans into passes. Costs are counted in
+    milliseconds decoded: a pass costs overhead_ms plus the length of the
+    stretch it decodes, so a span joins the current pass when the extra
+    stretch it adds is no more than running it on its own would cost, which
+    comes down to a gap of at most overhead_ms. Overlapping and nearby spans
+    end up together; distant ones stay apart.
+    """
+    index = IntervalIndex((start, end, i) for i, (start, end) in enumerate(spans))
+    passes: list[ExportPass] = []
+    for cluster in index.clusters(max_gap=overhead_ms):
+        for offset in range(0, len(cluster), max_outputs):
+            indices = cluster[offset:offset + max_outputs]
+            passes.append(ExportPass(
+                min(spans[i][0] for i in indices), max(spans[i][1] for i in indices), indices
+            ))
+    return passes
+
+
+def pass_saving_ms(spans: list[tuple[int, int]], export_pass: ExportPass, overhead_ms: int = PASS_OVERHEAD_MS) -> int:
+    """Decode time saved by running export_pass as one pass rather than one run per span."""
+    separate = sum(overhead_ms + spans[i][1] - spans[i][0] for i in export_pass.indices)
+    return separate - (overhead_ms + export_pass.span_ms)
+
+
+class MultiOutputExporter:
+    def __init__(self, ffmpeg_path: str, runner: Optional[FFmpegRunner] = None):
+        self.ffmpeg_path = ffmpeg_path
+        self.runner = runner or FFmpegRunner()
+    
+    def export(
+        self,
+        source: Path,
+        export_pass: ExportPass,
+        spans: list[tuple[int, int]],
+        outputs: list[Path],
+        audio_only: bool = False,
+        with_audio: bool = True,
+        threads: Optional[int] = None,
+        progress_callback: Optional[Callable[[FFmpegProgress], None]] = None,
+        cancel: Optional[threading.Event] = None
+    ) -> list[Path]:
+        """
+        Write spans[i] to outputs[i] for every index in export_pass, from a
+        single decode of export_pass's stretch of the source. Audio exports
+        are 16-bit 44.1kHz stereo WAV, video exports H.264/AAC, matching the
+        per-segment exporters. ffmpeg reports the furthest output's position,
+        so progress out_time runs up to the longest span in the pass.
+        """
+        indices = export_pass.indices
+        count = len(indices)
+        offset = export_pass.start_ms
+        filters = []
+        if not audio_only:
+            filters.append(f"[0:v]split={count}" + "".join(f"[vin{n}]" for n in range(count)))
+        if audio_only or with_audio:
+            filters.append(f"[0:a]asplit={count}" + "".join(f"[ain{n}]" for n in range(count)))
+        for n, i in enumerate(indices):
+            start = (spans[i][0] - offset) / 1000
+            end = (spans[i][1] - offset) / 1000
+            if not audio_only:
+                filters.append(f"[vin{n}]trim=start={start:.3f}:end={end:.3f},setpts=PTS-STARTPTS[v{n}]")
+            if audio_only or with_audio:
+                filters.append(f"[ain{n}]atrim=start={start:.3f}:end={end:.3f},asetpts=PTS-STARTPTS[a{n}]")
+        
+        cmd = [
+            self.ffmpeg_path, "-y",
+            "-ss", f"{offset / 1000:.3f}",
+            "-t", f"{export_pass.span_ms / 1000:.3f}",
+            "-i", str(source),
+            "-filter_complex", ";".join(filters),
+        ]
+        for n, i in enumerate(indices):
+            outputs[i].parent.mkdir(parents=True, exist_ok=True)
+            if audio_only:
+                cmd += ["-map", f"[a{n}]", "-acodec", "pcm_s16le", "-ar", "44100", "-ac", "2"]
+            else:
+                cmd += ["-map", f"[v{n}]", "-c:v", "libx264", "-preset", "fast"]
+                if with_audio:
+                    cmd += ["-map", f"[a{n}]", "-c:a", "aac"]
+            if threads:
+                cmd += ["-threads", str(threads)]
+            cmd.append(str(outputs[i]))
+        
+        logger.info(
+            f"Single-pass export of {count} segments from {source.name} "
+            f"({export_pass.start_ms}ms - {export_pass.end_ms}ms)"
+        )
+        try:
+            self.runner.run(cmd, progress_callback, cancel, outputs=[outputs[i] for i in indices])
+        except FFmpegError as e:
+            logger.error(f"FFmpeg error: {e.stderr}")
+            raise RuntimeError(f"Single-pass export failed: {e}\n{e.stderr}") from e
+        return [outputs[i] for i in indices]
@@ -2,6 +2,7 @@
 import sys
 import os
 from pathlib import Path
+from typing import Optional
 
 
 def get_app_data_dir() -> Path:
@@ -53,3 +54,39 @@ def get_exports_dir() -> Path:
     exports_dir = docs / "MediaDownloader"
     exports_dir.mkdir(parents=True, exist_ok=True)
     return exports_dir
+
+
+def get_cache_dir() -> Path:
+    """Get the directory for on-disk caches (metadata, indexes, derived media)."""
+    cache_dir = get_app_data_dir() / "Cache"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def trim_cache_dir(directory: Path, pattern: str, max_bytes: int, keep: Optional[Path] = None) -> list[Path]:
+    """
+    Delete the least recently used files matching pattern in directory until
+    they total at most max_bytes. Caches touch their files on every hit, so
+    mtime is the last use. Returns the deleted paths.
+    """
+    entries = []
+    for path in directory.glob(pattern):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    removed = []
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
+        removed.append(path)
+    return removed
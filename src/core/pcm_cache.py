@@ -0,0 +1,113 @@
+"""
+Decoded audio cache: a source's audio is decoded once to raw PCM in the
+export format, and WAV segments are then sliced out of it through a memory
+map with no further decoding.
+"""
+import hashlib
+import mmap
+import threading
+import wave
+from pathlib import Path
+from typing import Callable, Optional
+from .ffmpeg_runner import FFmpegError, FFmpegProgress, FFmpegRunner
+from .logger import get_logger
+from .paths import get_cache_dir, trim_cache_dir
+
+logger = get_logger(__name__)
+
+# Matches the WAV segments export_audio writes: 16-bit 44.1kHz stereo
+SAMPLE_RATE = 44100
+CHANNELS = 2
+SAMPLE_WIDTH = 2
+FRAME_BYTES = CHANNELS * SAMPLE_WIDTH
+# About three and a half hours of audio; least recently used sources go first
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+
+def ms_to_frame(ms: int) -> int:
+    return ms * SAMPLE_RATE // 1000
+
+
+class PcmCache:
+    def __init__(
+        self,
+        ffmpeg_path: str,
+        runner: Optional[FFmpegRunner] = None,
+        cache_dir: Optional[Path] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        self.ffmpeg_path = ffmpeg_path
+        self.runner = runner or FFmpegRunner()
+        self.cache_dir = cache_dir or get_cache_dir() / "pcm"
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+    
+    def path_for(self, source: Path) -> Path:
+        # Keyed on size and mtime too, so a replaced file never reuses stale audio
+        source = Path(source).resolve()
+        stat = source.stat()
+        key = hashlib.sha1(f"{source}|{stat.st_size}|{stat.st_mtime_ns}".encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{key}.pcm"
+    
+    def lookup(self, source: Path) -> Optional[Path]:
+        try:
+            path = self.path_for(source)
+        except OSError:
+            return None
+        if not path.exists():
+            return None
+        path.touch()
+        return path
+    
+    def decode(
+        self,
+        source: Path,
+        progress_callback: Optional[Callable[[FFmpegProgress], None]] = None,
+        cancel: Optional[threading.Event] = None
+    ) -> Path:
+        """Decode source's first audio stream into the cache, unless it is there already."""
+        with self._lock:
+            cached = self.lookup(source)
+            if cached:
+                return cached
+            path = self.path_for(source)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            partial = path.with_suffix(".part")
+            cmd = [
+                self.ffmpeg_path, "-y", "-i", str(source),
+                "-map", "0:a:0", "-vn", "-sn",
+                "-f", "s16le", "-acodec", "pcm_s16le",
+                "-ar", str(SAMPLE_RATE), "-ac", str(CHANNELS),
+                str(partial)
+            ]
+            logger.info(f"Decoding audio of {source.name} into the PCM cache")
+            try:
+                self.runner.run(cmd, progress_callback, cancel, outputs=[partial])
+            except FFmpegError as e:
+                logger.error(f"FFmpeg error: {e.stderr}")
+                raise RuntimeError(f"Audio decode failed: {e}\n{e.stderr}") from e
+            partial.replace(path)
+            for evicted in trim_cache_dir(self.cache_dir, "*.pcm", self.max_bytes, keep=path):
+                logger.debug(f"Evicted {evicted.name} from the PCM cache")
+            return path
+    
+    def write_wav(self, pcm: Path, output: Path, start_ms: int, end_ms: int) -> Path:
+        """Write [start_ms, end_ms) of a cached decode to output as a WAV file."""
+        size = pcm.stat().st_size
+        start = min(ms_to_frame(start_ms) * FRAME_BYTES, size)
+        end = min(ms_to_frame(end_ms) * FRAME_BYTES, size)
+        if end <= start:
+            raise RuntimeError(f"No audio between {start_ms}ms and {end_ms}ms")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            with open(pcm, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                # The memoryview slice goes straight from the page cache to the output file
+                with memoryview(data) as view, wave.open(str(output), "wb") as wav:
+                    wav.setnchannels(CHANNELS)
+                    wav.setsampwidth(SAMPLE_WIDTH)
+                    wav.setframerate(SAMPLE_RATE)
+                    wav.writeframesraw(view[start:end])
+        except BaseException:
+            output.unlink(missing_ok=True)
+            raise
+        return output
@@ -0,0 +1,112 @@
+"""Rate-limited progress reporting shared by downloads and exports."""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+# Publish at most this many updates per second; status changes and completion always go through
+DEFAULT_MAX_UPDATES_PER_SECOND = 10.0
+# Weight of the newest sample in the smoothed rate
+RATE_SMOOTHING = 0.3
+MIN_RATE_SAMPLE_SECONDS = 0.25
+
+
+@dataclass(frozen=True)
+class Progress:
+    fraction: float
+    status: str
+    done: int = 0
+    total: int = 0
+    rate: float = 0.0
+    eta: Optional[float] = None
+    finished: bool = False
+
+
+class ProgressAggregator:
+    """
+    Collects raw progress updates (one per chunk, per fragment, per ffmpeg
+    line...) and publishes at most max_rate structured Progress objects per
+    second, with a smoothed rate and ETA. done/total are in whatever unit the
+    producer counts: bytes for downloads, segments or media milliseconds for
+    exports. Safe to feed from several threads.
+    """
+    
+    def __init__(
+        self,
+        callback: Optional[Callable[[Progress], None]],
+        max_rate: float = DEFAULT_MAX_UPDATES_PER_SECOND
+    ):
+        self.callback = callback
+        self.min_interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self._fraction = 0.0
+        self._status = ""
+        self._done = 0
+        self._total = 0
+        self._rate = 0.0
+        self._sample_time: Optional[float] = None
+        self._sample_done = 0
+        self._last_publish = 0.0
+        self._lock = threading.Lock()
+    
+    def update(
+        self,
+        fraction: Optional[float] = None,
+        status: Optional[str] = None,
+        done: Optional[int] = None,
+        total: Optional[int] = None,
+        force: bool = False
+    ):
+        now = time.monotonic()
+        with self._lock:
+            status_changed = status is not None and status != self._status
+            if status is not None:
+                self._status = status
+            if total is not None:
+                self._total = total
+            if done is not None:
+                self._sample(done, now)
+                self._done = done
+            if fraction is not None:
+                self._fraction = min(max(fraction, 0.0), 1.0)
+            elif done is not None and self._total > 0:
+                self._fraction = min(done / self._total, 1.0)
+            
+            if not (force or status_changed) and now - self._last_publish < self.min_interval:
+                return
+            self._last_publish = now
+            progress = self._snapshot(finished=False)
+        self._publish(progress)
+    
+    def finish(self, status: str = "Complete!"):
+        with self._lock:
+            self._status = status
+            self._fraction = 1.0
+            if self._total:
+                self._done = self._total
+            progress = self._snapshot(finished=True)
+        self._publish(progress)
+    
+    def _sample(self, done: int, now: float):
+        if self._sample_time is None or done < self._sample_done:
+            # First sample, or the producer moved on to a new file/stream and restarted its count
+            self._sample_time, self._sample_done = now, done
+            return
+        elapsed = now - self._sample_time
+        if elapsed < MIN_RATE_SAMPLE_SECONDS:
+            return
+        rate = (done - self._sample_done) / elapsed
+        self._rate = rate if self._rate == 0 else (1 - RATE_SMOOTHING) * self._rate + RATE_SMOOTHING * rate
+        self._sample_time, self._sample_done = now, done
+    
+    def _snapshot(self, finished: bool) -> Progress:
+        eta = None
+        if not finished and self._rate > 0 and self._total > self._done:
+            eta = (self._total - self._done) / self._rate
+        return Progress(
+            fraction=self._fraction, status=self._status, done=self._done, total=self._total,
+            rate=self._rate, eta=eta, finished=finished,
+        )
+    
+    def _publish(self, progress: Progress):
+        if self.callback:
+            self.callback(progress)
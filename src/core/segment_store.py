@@ -0,0 +1,157 @@
+"""
+The one list of segments being edited, shared by the timeline, the segment
+panel and the exporter. Views read it in place and are told about changes
+through listeners, instead of keeping their own copies in sync.
+"""
+from array import array
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from enum import Enum
+from typing import Callable, Iterator, Optional
+from .interval_index import IntervalIndex
+
+
+@dataclass(frozen=True)
+class Segment:
+    # Immutable, so a list of them is a safe snapshot to hand to another thread
+    __slots__ = ("name", "start_ms", "end_ms")
+    name: str
+    start_ms: int
+    end_ms: int
+
+
+class ChangeKind(Enum):
+    INSERTED = "inserted"
+    REMOVED = "removed"
+    CHANGED = "changed"
+    # Anything else, or several changes at once: views should re-read everything
+    RESET = "reset"
+
+
+@dataclass(frozen=True)
+class SegmentChange:
+    kind: ChangeKind
+    # Inclusive row range; for REMOVED, the rows as they were before removal
+    first: int = 0
+    last: int = -1
+
+
+class SegmentStore:
+    """
+    Segments in list order, plus a stable key per segment (for things like
+    its color) that survives removals of the segments before it.
+    
+    Changes made inside batch() are announced once when it ends: edits as
+    one CHANGED over the rows they touched, appends as one INSERTED, and
+    any other mix as RESET.
+    """
+    
+    def __init__(self):
+        self._segments: list[Segment] = []
+        self._keys = array("L")
+        self._next_key = 0
+        self._listeners: list[Callable[[SegmentChange], None]] = []
+        self._index: Optional[IntervalIndex] = None
+        self._batch_depth = 0
+        self._pending: Optional[SegmentChange] = None
+    
+    def __len__(self) -> int:
+        return len(self._segments)
+    
+    def __getitem__(self, index: int) -> Segment:
+        return self._segments[index]
+    
+    def __iter__(self) -> Iterator[Segment]:
+        return iter(self._segments)
+    
+    def key(self, index: int) -> int:
+        return self._keys[index]
+    
+    def snapshot(self) -> list[Segment]:
+        """The segments as they are now, for use off the UI thread."""
+        return list(self._segments)
+    
+    def index(self) -> IntervalIndex:
+        """Interval index over the segments keyed by row; rebuilt on the first query after a change."""
+        if self._index is None:
+            self._index = IntervalIndex((seg.start_ms, seg.end_ms, i) for i, seg in enumerate(self._segments))
+        return self._index
+    
+    def subscribe(self, listener: Callable[[SegmentChange], None]):
+        self._listeners.append(listener)
+    
+    def unsubscribe(self, listener: Callable[[SegmentChange], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def append(self, name: str, start_ms: int, end_ms: int) -> int:
+        self.extend([(name, start_ms, end_ms)])
+        return len(self._segments) - 1
+    
+    def extend(self, segments: list[tuple[str, int, int]]):
+        first = len(self._segments)
+        for name, start_ms, end_ms in segments:
+            self._segments.append(Segment(name, start_ms, end_ms))
+            self._keys.append(self._next_key)
+            self._next_key += 1
+        if len(self._segments) > first:
+            self._changed(SegmentChange(ChangeKind.INSERTED, first, len(self._segments) - 1))
+    
+    def update(
+        self,
+        index: int,
+        name: Optional[str] = None,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None
+    ):
+        seg = self._segments[index]
+        updated = replace(
+            seg,
+            name=seg.name if name is None else name,
+            start_ms=seg.start_ms if start_ms is None else start_ms,
+            end_ms=seg.end_ms if end_ms is None else end_ms
+        )
+        if updated != seg:
+            self._segments[index] = updated
+            self._changed(SegmentChange(ChangeKind.CHANGED, index, index))
+    
+    def remove(self, index: int):
+        del self._segments[index]
+        del self._keys[index]
+        self._changed(SegmentChange(ChangeKind.REMOVED, index, index))
+    
+    def clear(self):
+        self._segments.clear()
+        self._keys = array("L")
+        self._next_key = 0
+        self._changed(SegmentChange(ChangeKind.RESET))
+    
+    @contextmanager
+    def batch(self):
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and self._pending:
+                change, self._pending = self._pending, None
+                self._notify(change)
+    
+    def _changed(self, change: SegmentChange):
+        self._index = None
+        if not self._batch_depth:
+            self._notify(change)
+        elif self._pending is None:
+            self._pending = change
+        elif self._pending.kind == change.kind == ChangeKind.CHANGED:
+            self._pending = SegmentChange(
+                ChangeKind.CHANGED, min(self._pending.first, change.first), max(self._pending.last, change.last)
+            )
+        elif self._pending.kind == change.kind == ChangeKind.INSERTED and change.first == self._pending.last + 1:
+            self._pending = SegmentChange(ChangeKind.INSERTED, self._pending.first, change.last)
+        else:
+            self._pending = SegmentChange(ChangeKind.RESET)
+    
+    def _notify(self, change: SegmentChange):
+        for listener in list(self._listeners):
+            listener(change)
@@ -0,0 +1,228 @@
+"""
+Keyframe-aware cutting: stream-copy the GOPs that lie entirely inside a cut
+and re-encode only the partial GOPs at either end.
+"""
+import math
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+from .ffmpeg_runner import FFmpegProgress, FFmpegRunner
+from .logger import get_logger
+from .media_info import MediaProbeError, MediaProber
+
+logger = get_logger(__name__)
+
+# Video codecs whose partial GOPs can be re-encoded into a bitstream that
+# concatenates cleanly with the copied middle, and the encoder to use
+ENCODERS = {"h264": "libx264"}
+# x264 profile names for the profiles ffprobe reports
+H264_PROFILES = {
+    "Constrained Baseline": "baseline",
+    "Baseline": "baseline",
+    "Main": "main",
+    "High": "high",
+}
+# Keyframe times are compared with this much slack to absorb float rounding
+KEYFRAME_EPSILON = 0.001
+
+
+class SmartCutUnavailable(Exception):
+    """The source or cut can't be smart-cut; callers should re-encode instead."""
+
+
+@dataclass
+class VideoStream:
+    codec: str
+    profile: Optional[str]
+    pix_fmt: Optional[str]
+    frame_rate: Optional[float] = None
+
+
+@dataclass
+class CutPlan:
+    """Times in seconds. head and tail are re-encoded, copy is stream-copied; any may be empty."""
+    start: float
+    end: float
+    copy_start: float
+    copy_end: float
+    
+    @property
+    def has_head(self) -> bool:
+        return self.copy_start - self.start > KEYFRAME_EPSILON
+    
+    @property
+    def has_tail(self) -> bool:
+        return self.end - self.copy_end > KEYFRAME_EPSILON
+
+
+def plan_cut(keyframes: list[float], start: float, end: float, frame_rate: Optional[float] = None) -> CutPlan:
+    """
+    Pick the first and last keyframes inside [start, end] as the stream-copy
+    bounds. With frame_rate, start and end are moved onto the source's frame
+    grid (counted from the keyframes, by less than a frame), so the head and
+    tail hold a whole number of frames and butt exactly against the copy.
+    """
+    inside = [k for k in keyframes if start - KEYFRAME_EPSILON <= k <= end + KEYFRAME_EPSILON]
+    if len(inside) < 2:
+        raise SmartCutUnavailable("cut does not contain a complete GOP")
+    copy_start, copy_end = max(inside[0], start), min(inside[-1], end)
+    if frame_rate:
+        # The head is the frames in [start, copy_start), the tail those in [copy_end, end)
+        start = copy_start - math.floor((copy_start - start) * frame_rate + KEYFRAME_EPSILON) / frame_rate
+        end = copy_end + math.ceil((end - copy_end) * frame_rate - KEYFRAME_EPSILON) / frame_rate
+    return CutPlan(start=start, end=end, copy_start=copy_start, copy_end=copy_end)
+
+
+class SmartCutter:
+    def __init__(self, ffmpeg_path: str, prober: MediaProber, runner: Optional[FFmpegRunner] = None):
+        self.ffmpeg_path = ffmpeg_path
+        self.prober = prober
+        self.runner = runner or FFmpegRunner()
+    
+    def probe_video(self, source: Path) -> VideoStream:
+        video = self._probe(source).video
+        if video is None:
+            raise SmartCutUnavailable("source has no video stream")
+        return VideoStream(
+            codec=video.codec_name, profile=video.profile, pix_fmt=video.pix_fmt, frame_rate=video.frame_rate
+        )
+    
+    def probe_keyframes(self, source: Path, start: float, end: float) -> list[float]:
+        """Keyframe times in [start, end] from the source's cached keyframe index."""
+        info = self._probe(source, keyframes=True)
+        start_ms = int(start * 1000) - 1
+        end_ms = int(end * 1000) + 1
+        return [k / 1000 for k in info.keyframes_between(start_ms, end_ms)]
+    
+    def cut(
+        self,
+        source: Path,
+        output: Path,
+        start_ms: int,
+        end_ms: int,
+        threads: Optional[int] = None,
+        progress_callback: Optional[Callable[[FFmpegProgress], None]] = None,
+        cancel: Optional[threading.Event] = None
+    ) -> Path:
+        """
+        Cut [start_ms, end_ms) from source into output. Raises
+        SmartCutUnavailable before writing anything if the source isn't
+        eligible, so the caller can fall back to a full re-encode.
+        progress_callback follows the final mux, which covers the whole cut.
+        """
+        start, end = start_ms / 1000, end_ms / 1000
+        stream = self.probe_video(source)
+        encoder = ENCODERS.get(stream.codec)
+        if not encoder:
+            raise SmartCutUnavailable(f"no matching encoder for {stream.codec or 'unknown'} video")
+        plan = plan_cut(self.probe_keyframes(source, start, end), start, end, stream.frame_rate)
+        # Audio follows the frame-aligned bounds so it stays in sync with the video
+        start, end = plan.start, plan.end
+        logger.debug(
+            f"Smart cut {source.name}: copy {plan.copy_start:.3f}-{plan.copy_end:.3f}s "
+            f"of {start:.3f}-{end:.3f}s"
+        )
+        
+        with tempfile.TemporaryDirectory(prefix="smartcut-", dir=output.parent) as tmp:
+            tmp_dir = Path(tmp)
+            # (file, length) pairs. Every part is given its exact length:
+            # otherwise the concat demuxer goes by the part's probed duration,
+            # which for an encoded part runs a frame or more long and leaves a
+            # gap before the next part, and stream copy overshoots -t to the
+            # next packet boundary
+            parts = []
+            if plan.has_head:
+                head = self._encode_part(
+                    source, tmp_dir / "head.nut", plan.start, plan.copy_start, stream, encoder, threads, cancel
+                )
+                parts.append((head, plan.copy_start - plan.start))
+            copied = self._copy_part(source, tmp_dir / "copy.nut", plan.copy_start, plan.copy_end, cancel)
+            parts.append((copied, plan.copy_end - plan.copy_start))
+            if plan.has_tail:
+                tail = self._encode_part(
+                    source, tmp_dir / "tail.nut", plan.copy_end, plan.end, stream, encoder, threads, cancel
+                )
+                parts.append((tail, plan.end - plan.copy_end))
+            
+            concat_list = tmp_dir / "parts.txt"
+            lines = []
+            for part, length in parts:
+                lines.append(f"file '{self._concat_escape(part)}'\n")
+                lines.append(f"outpoint {length:.6f}\nduration {length:.6f}\n")
+            concat_list.write_text("".join(lines), encoding="utf-8")
+            # Audio is cut sample-accurately and re-encoded on its own; it is cheap next to video
+            cmd = [
+                self.ffmpeg_path, "-y",
+                "-f", "concat", "-safe", "0", "-i", str(concat_list),
+                "-ss", f"{start:.6f}", "-t", f"{end - start:.6f}", "-i", str(source),
+                "-map", "0:v:0", "-map", "1:a:0?",
+                "-c:v", "copy", "-c:a", "aac",
+                "-movflags", "+faststart",
+            ]
+            if threads:
+                cmd += ["-threads", str(threads)]
+            cmd.append(str(output))
+            self.runner.run(cmd, progress_callback, cancel, outputs=[output])
+        return output
+    
+    def _encode_part(
+        self,
+        source: Path,
+        output: Path,
+        start: float,
+        end: float,
+        stream: VideoStream,
+        encoder: str,
+        threads: Optional[int] = None,
+        cancel: Optional[threading.Event] = None
+    ) -> Path:
+        cmd = [
+            self.ffmpeg_path, "-y",
+            "-ss", f"{start:.6f}", "-i", str(source), "-t", f"{end - start:.6f}",
+            "-map", "0:v:0", "-an", "-sn",
+            "-c:v", encoder, "-preset", "fast", "-crf", "18",
+        ]
+        # Match the copied GOPs so decoders see one consistent stream
+        profile = H264_PROFILES.get(stream.profile or "")
+        if profile:
+            cmd += ["-profile:v", profile]
+        if stream.pix_fmt:
+            cmd += ["-pix_fmt", stream.pix_fmt]
+        if threads:
+            cmd += ["-threads", str(threads)]
+        # The MP4's avcC holds only the first part's SPS/PPS, so every part
+        # repeats its own in-band at each keyframe (see _copy_part)
+        cmd += ["-bsf:v", "dump_extra=freq=keyframe", "-f", "nut", str(output)]
+        self.runner.run(cmd, cancel=cancel)
+        return output
+    
+    def _copy_part(
+        self,
+        source: Path,
+        output: Path,
+        start: float,
+        end: float,
+        cancel: Optional[threading.Event] = None
+    ) -> Path:
+        cmd = [
+            self.ffmpeg_path, "-y",
+            "-ss", f"{start:.6f}", "-i", str(source), "-t", f"{end - start:.6f}",
+            "-map", "0:v:0", "-an", "-sn",
+            # In-band SPS/PPS at every keyframe, so these GOPs decode with the
+            # source's parameter sets rather than the encoded parts' in avcC
+            "-c:v", "copy", "-bsf:v", "h264_mp4toannexb,dump_extra=freq=keyframe",
+            "-f", "nut", str(output)
+        ]
+        self.runner.run(cmd, cancel=cancel)
+        return output
+    
+    def _concat_escape(self, path: Path) -> str:
+        return str(path.resolve()).replace("'", "'\\''")
+    
+    def _probe(self, source: Path, keyframes: bool = False):
+        try:
+            return self.prober.probe(source, keyframes)
+        except MediaProbeError as e:
+            raise SmartCutUnavailable(f"could not probe source: {e}")
@@ -0,0 +1,41 @@
+"""Thin thread-safe wrapper around a SQLite database file."""
+import sqlite3
+import threading
+from pathlib import Path
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class SqliteStore:
+    """
+    Base class for the small persistent indexes kept under the app data dir.
+    
+    Subclasses set SCHEMA; the connection is shared between threads and
+    serialized with a lock, which is plenty for the handful of writes per
+    download or export.
+    """
+    SCHEMA = ""
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.executescript(self.SCHEMA)
+        logger.debug(f"{type(self).__name__} opened: {self.path}")
+    
+    def _query(self, sql: str, params: tuple = ()) -> list[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+    
+    def _execute(self, sql: str, params: tuple = ()) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute(sql, params).rowcount
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
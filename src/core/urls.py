@@ -0,0 +1,48 @@
+"""URL helpers for recognising the same video behind different link forms."""
+import re
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+_YOUTUBE_ID = re.compile(r"^[A-Za-z0-9_-]{11}$")
+_YOUTUBE_HOSTS = ("youtube.com", "youtube-nocookie.com", "youtu.be")
+_YOUTUBE_PATH_PREFIXES = ("shorts", "embed", "live", "v", "e")
+
+
+def canonical_video_id(url: str) -> Optional[str]:
+    """
+    Return a stable "site:id" key for a video URL, or None if it isn't recognised.
+    
+    youtu.be links, shorts, embeds, live links and watch URLs carrying a
+    playlist all map to the same "youtube:<id>" key.
+    """
+    parsed = urlparse(url.strip() if "://" in url else f"https://{url.strip()}")
+    host = (parsed.hostname or "").lower()
+    if not any(host == h or host.endswith(f".{h}") for h in _YOUTUBE_HOSTS):
+        return None
+    
+    parts = [p for p in parsed.path.split("/") if p]
+    candidate = None
+    if host.endswith("youtu.be"):
+        candidate = parts[0] if parts else None
+    elif parts and parts[0] in _YOUTUBE_PATH_PREFIXES and len(parts) > 1:
+        candidate = parts[1]
+    else:
+        candidate = parse_qs(parsed.query).get("v", [None])[0]
+    
+    if candidate and _YOUTUBE_ID.match(candidate):
+        return f"youtube:{candidate}"
+    return None
+
+
+def info_video_id(info: dict) -> Optional[str]:
+    """Build the same "site:id" key from a yt-dlp info dict."""
+    video_id = info.get("id")
+    extractor = (info.get("extractor_key") or info.get("extractor") or "").lower()
+    if not video_id or not extractor:
+        return None
+    return f"{extractor}:{video_id}"
+
+
+def cache_key(url: str) -> str:
+    """Key for URL-addressed caches: the canonical video ID when known, else the URL."""
+    return canonical_video_id(url) or url.strip()
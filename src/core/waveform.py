@@ -0,0 +1,187 @@
+"""
+Waveform peaks for the timeline: the audio is decoded once at a low rate and
+reduced to min/max peaks at a series of halving resolutions, like mipmaps,
+so any zoom level is drawn from the nearest level without touching the audio
+again. Peaks are kept in a small binary file next to the source.
+"""
+import hashlib
+import struct
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+import numpy as np
+from .ffmpeg_runner import FFmpegError, FFmpegRunner
+from .logger import get_logger
+from .paths import get_cache_dir
+
+logger = get_logger(__name__)
+
+# Mono, plenty for an envelope that's a few hundred pixels wide
+SAMPLE_RATE = 8000
+# Samples per peak at the finest level: 8ms
+BASE_BLOCK = 64
+# Coarser levels are added until one has no more peaks than this
+MIN_LEVEL_PEAKS = 512
+# Samples reduced per step while building, to keep memory flat on long files
+CHUNK_SAMPLES = BASE_BLOCK * 16384
+
+PEAKS_SUFFIX = ".peaks"
+_MAGIC = b"MDPK"
+_VERSION = 1
+# magic, version, sample rate, base block, level count, source size, source mtime_ns
+_HEADER = struct.Struct("<4sHIIHQq")
+_LEVEL_LENGTH = struct.Struct("<I")
+
+
+@dataclass
+class WaveformPeaks:
+    sample_rate: int
+    block: int
+    # levels[n] has one (min, max) int8 row per block * 2**n samples
+    levels: list[np.ndarray]
+    
+    @property
+    def duration_ms(self) -> int:
+        return len(self.levels[0]) * self.block * 1000 // self.sample_rate
+    
+    def columns(self, start_ms: int, end_ms: int, width: int) -> np.ndarray:
+        """
+        (width, 2) array of min/max in [-1, 1] for [start_ms, end_ms) spread
+        over width pixels, from the coarsest level that still has at least
+        one peak per pixel. Columns past the end of the audio are zero.
+        """
+        result = np.zeros((max(width, 0), 2), dtype=np.float32)
+        if width <= 0 or end_ms <= start_ms:
+            return result
+        ms_per_pixel = (end_ms - start_ms) / width
+        level = 0
+        while level + 1 < len(self.levels) and self._block_ms(level + 1) <= ms_per_pixel:
+            level += 1
+        peaks = self.levels[level]
+        block_ms = self._block_ms(level)
+        edges = (start_ms + np.arange(width + 1) * ms_per_pixel) / block_ms
+        edges = np.clip(edges.astype(np.int64), 0, len(peaks))
+        # Every pixel covers at least one peak, unless it lies past the end
+        starts = edges[:-1]
+        stops = np.maximum(edges[1:], starts + 1)
+        visible = starts < len(peaks)
+        if not visible.any():
+            return result
+        starts = starts[visible]
+        # reduceat runs each range up to the next start, and the last one to the end of its input
+        peaks = peaks[:min(stops[visible][-1], len(peaks))]
+        mins = np.minimum.reduceat(peaks[:, 0], starts)
+        maxs = np.maximum.reduceat(peaks[:, 1], starts)
+        result[visible, 0] = mins / 128.0
+        result[visible, 1] = maxs / 127.0
+        return result
+    
+    def _block_ms(self, level: int) -> float:
+        return self.block * (1 << level) * 1000 / self.sample_rate
+
+
+def peaks_path(source: Path) -> Path:
+    return source.with_name(source.name + PEAKS_SUFFIX)
+
+
+def _fallback_path(source: Path) -> Path:
+    # For sources in folders we can't write to
+    key = hashlib.sha1(str(source.resolve()).encode("utf-8")).hexdigest()
+    return get_cache_dir() / "waveforms" / f"{key}{PEAKS_SUFFIX}"
+
+
+def _reduce(peaks: np.ndarray) -> np.ndarray:
+    if len(peaks) % 2:
+        peaks = np.concatenate([peaks, peaks[-1:]])
+    pairs = peaks.reshape(-1, 2, 2)
+    return np.stack([pairs[:, :, 0].min(axis=1), pairs[:, :, 1].max(axis=1)], axis=1)
+
+
+def _build_levels(samples: np.ndarray, block: int = BASE_BLOCK) -> list[np.ndarray]:
+    chunks = []
+    for offset in range(0, len(samples), CHUNK_SAMPLES):
+        chunk = np.asarray(samples[offset:offset + CHUNK_SAMPLES])
+        if len(chunk) % block:
+            chunk = np.concatenate([chunk, np.zeros(block - len(chunk) % block, dtype=chunk.dtype)])
+        blocks = chunk.reshape(-1, block)
+        # int16 -> int8 by dropping the low byte; an arithmetic shift keeps the sign
+        chunks.append(np.stack([blocks.min(axis=1) >> 8, blocks.max(axis=1) >> 8], axis=1).astype(np.int8))
+    levels = [np.concatenate(chunks) if chunks else np.zeros((0, 2), dtype=np.int8)]
+    while len(levels[-1]) > MIN_LEVEL_PEAKS:
+        levels.append(_reduce(levels[-1]))
+    return levels
+
+
+class WaveformBuilder:
+    def __init__(self, ffmpeg_path: str, runner: Optional[FFmpegRunner] = None):
+        self.ffmpeg_path = ffmpeg_path
+        self.runner = runner or FFmpegRunner()
+    
+    def load(self, source: Path) -> Optional[WaveformPeaks]:
+        """Peaks previously built for source, if it hasn't changed since."""
+        stat = source.stat()
+        for path in (peaks_path(source), _fallback_path(source)):
+            if path.exists():
+                peaks = self._read(path, stat.st_size, stat.st_mtime_ns)
+                if peaks:
+                    return peaks
+        return None
+    
+    def build(self, source: Path, cancel: Optional[threading.Event] = None) -> WaveformPeaks:
+        """Decode source's audio and build its peaks, saving them for next time."""
+        stat = source.stat()
+        with tempfile.TemporaryDirectory(prefix="waveform-", dir=get_cache_dir()) as tmp:
+            decoded = Path(tmp) / "audio.raw"
+            cmd = [
+                self.ffmpeg_path, "-y", "-i", str(source),
+                "-map", "0:a:0", "-vn", "-sn",
+                "-ac", "1", "-ar", str(SAMPLE_RATE),
+                "-f", "s16le", "-acodec", "pcm_s16le", str(decoded)
+            ]
+            try:
+                self.runner.run(cmd, cancel=cancel, outputs=[decoded])
+            except FFmpegError as e:
+                raise RuntimeError(f"Could not decode audio for the waveform: {e}\n{e.stderr}") from e
+            if decoded.stat().st_size < 2:
+                levels = _build_levels(np.zeros(0, dtype=np.int16))
+            else:
+                levels = _build_levels(np.memmap(decoded, dtype="<i2", mode="r"))
+        peaks = WaveformPeaks(SAMPLE_RATE, BASE_BLOCK, levels)
+        self._save(source, peaks, stat.st_size, stat.st_mtime_ns)
+        return peaks
+    
+    def _save(self, source: Path, peaks: WaveformPeaks, size: int, mtime_ns: int):
+        header = _HEADER.pack(_MAGIC, _VERSION, peaks.sample_rate, peaks.block, len(peaks.levels), size, mtime_ns)
+        for path in (peaks_path(source), _fallback_path(source)):
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(path, "wb") as f:
+                    f.write(header)
+                    for level in peaks.levels:
+                        f.write(_LEVEL_LENGTH.pack(len(level)))
+                        f.write(level.tobytes())
+                logger.debug(f"Saved waveform peaks: {path}")
+                return
+            except OSError as e:
+                logger.debug(f"Could not write waveform peaks to {path}: {e}")
+        logger.warning(f"Waveform peaks for {source.name} could not be saved")
+    
+    def _read(self, path: Path, size: int, mtime_ns: int) -> Optional[WaveformPeaks]:
+        try:
+            data = path.read_bytes()
+            magic, version, sample_rate, block, count, src_size, src_mtime = _HEADER.unpack_from(data)
+            if magic != _MAGIC or version != _VERSION or (src_size, src_mtime) != (size, mtime_ns):
+                return None
+            offset = _HEADER.size
+            levels = []
+            for _ in range(count):
+                (length,) = _LEVEL_LENGTH.unpack_from(data, offset)
+                offset += _LEVEL_LENGTH.size
+                levels.append(np.frombuffer(data, dtype=np.int8, count=length * 2, offset=offset).reshape(-1, 2))
+                offset += length * 2
+        except (OSError, struct.error, ValueError) as e:
+            logger.debug(f"Ignoring unreadable waveform peaks {path}: {e}")
+            return None
+        return WaveformPeaks(sample_rate, block, levels) if levels else None
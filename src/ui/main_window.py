@@ -1,61 +1,74 @@
+import threading
 from pathlib import Path
+from typing import Optional
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
     QPushButton, QLineEdit, QLabel, QProgressBar,
-    QFileDialog, QMessageBox, QCheckBox, QFrame
+    QFileDialog, QMessageBox, QCheckBox, QFrame, QSpinBox
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import Qt, QThread, QObject, pyqtSignal
 
 from ui.styles import STYLESHEET
 from ui.video_player import VideoPlayer
 from ui.timeline import Timeline
 from ui.segment_panel import SegmentPanel
-from core.downloader import Downloader
-from core.media_processor import MediaProcessor, Segment
+from core.downloader import Downloader, SectionDownload
+from core.download_queue import DownloadQueue, DownloadJob, JobStatus
+from core.media_processor import MediaProcessor, ExportMode
+from core.ffmpeg_runner import FFmpegCancelled
+from core.progress import Progress
 from core.logger import get_logger
 from core.paths import get_downloads_dir, get_exports_dir
+from core.segment_store import Segment, SegmentStore
 
 logger = get_logger(__name__)
 
 
-class DownloadThread(QThread):
-    progress = pyqtSignal(float, str)
-    finished = pyqtSignal(Path)
-    error = pyqtSignal(str)
-    
-    def __init__(self, downloader: Downloader, url: str):
-        super().__init__()
-        self.downloader = downloader
-        self.url = url
-        logger.debug(f"DownloadThread created for: {url}")
-    
-    def run(self):
+def _parse_time(text: str) -> int:
+    """[[h:]m:]s, seconds possibly fractional, to milliseconds."""
+    seconds = 0.0
+    for part in text.split(":"):
+        seconds = seconds * 60 + float(part)
+    return round(seconds * 1000)
+
+
+def parse_ranges(text: str) -> list[Segment]:
+    """Segments from "start-end" ranges separated by spaces or commas, e.g. "1:00-1:30, 45:10-45:40"."""
+    segments = []
+    for n, token in enumerate(text.replace(",", " ").split(), start=1):
         try:
-            logger.info("DownloadThread: Starting download")
-            file_path = self.downloader.download(
-                self.url, 
-                lambda p, s: self.progress.emit(p, s)
-            )
-            logger.info(f"DownloadThread: Download complete: {file_path}")
-            self.finished.emit(file_path)
-        except Exception as e:
-            logger.error(f"DownloadThread error: {e}", exc_info=True)
-            self.error.emit(str(e))
+            start, end = (_parse_time(t) for t in token.split("-"))
+        except ValueError:
+            raise ValueError(f"Not a time range: {token}") from None
+        if end <= start:
+            raise ValueError(f"Range ends before it starts: {token}")
+        segments.append(Segment(f"Segment {n}", start, end))
+    return segments
+
+
+class DownloadQueueSignals(QObject):
+    job_updated = pyqtSignal(object)
+    job_finished = pyqtSignal(object)
 
 
 class ExportThread(QThread):
-    progress = pyqtSignal(float, str)
+    progress = pyqtSignal(object)
     finished = pyqtSignal(list)
     error = pyqtSignal(str)
+    cancelled = pyqtSignal(str)
     
     def __init__(self, processor: MediaProcessor, source: Path, 
-                 output_dir: Path, segments: list[Segment], audio_only: bool):
+                 output_dir: Path, segments: list[Segment], audio_only: bool,
+                 mode: ExportMode = ExportMode.REENCODE, join_name: Optional[str] = None):
         super().__init__()
         self.processor = processor
         self.source = source
         self.output_dir = output_dir
         self.segments = segments
         self.audio_only = audio_only
+        self.mode = mode
+        self.join_name = join_name
+        self._cancel = threading.Event()
         logger.debug(f"ExportThread created. Source: {source}, Segments: {len(segments)}")
     
     def run(self):
@@ -63,13 +76,91 @@ class ExportThread(QThread):
             logger.info("ExportThread: Starting export")
             outputs = self.processor.export_segments(
                 self.source, self.output_dir, self.segments,
-                self.audio_only, lambda p, s: self.progress.emit(p, s)
+                self.audio_only, self.progress.emit, self.mode, self._cancel, self.join_name
             )
             logger.info(f"ExportThread: Export complete. Outputs: {len(outputs)}")
             self.finished.emit(outputs)
+        except FFmpegCancelled as e:
+            logger.info(f"ExportThread: {e}")
+            self.cancelled.emit(str(e))
         except Exception as e:
             logger.error(f"ExportThread error: {e}", exc_info=True)
             self.error.emit(str(e))
+    
+    def cancel(self):
+        self._cancel.set()
+
+
+class TimelineMediaThread(QThread):
+    """Loads, or builds on first open, the waveform and then the filmstrip shown on the timeline."""
+    waveform_ready = pyqtSignal(object, object)
+    filmstrip_ready = pyqtSignal(object, object)
+    
+    def __init__(self, processor: MediaProcessor, source: Path):
+        super().__init__()
+        self.processor = processor
+        self.source = source
+        self._cancel = threading.Event()
+    
+    def run(self):
+        try:
+            peaks = self.processor.waveforms.load(self.source)
+            if peaks is None:
+                logger.info(f"TimelineMediaThread: Building waveform for {self.source.name}")
+                peaks = self.processor.waveforms.build(self.source, self._cancel)
+            self.waveform_ready.emit(self.source, peaks)
+        except FFmpegCancelled:
+            return
+        except Exception as e:
+            logger.warning(f"TimelineMediaThread: No waveform for {self.source.name}: {e}")
+        
+        try:
+            filmstrip = self.processor.filmstrips.load(self.source)
+            if filmstrip is None:
+                logger.info(f"TimelineMediaThread: Building filmstrip for {self.source.name}")
+                filmstrip = self.processor.filmstrips.build(self.source, self._duration_ms(), self._cancel)
+            self.filmstrip_ready.emit(self.source, filmstrip)
+        except FFmpegCancelled:
+            return
+        except Exception as e:
+            logger.warning(f"TimelineMediaThread: No filmstrip for {self.source.name}: {e}")
+    
+    def _duration_ms(self) -> Optional[int]:
+        try:
+            return self.processor.get_duration_ms(self.source)
+        except Exception:
+            return None
+    
+    def cancel(self):
+        self._cancel.set()
+
+
+class AnalysisThread(QThread):
+    finished = pyqtSignal(list)
+    error = pyqtSignal(str)
+    
+    def __init__(self, processor: MediaProcessor, source: Path, kind: str):
+        super().__init__()
+        self.processor = processor
+        self.source = source
+        self.kind = kind
+        self._cancel = threading.Event()
+    
+    def run(self):
+        try:
+            if self.kind == "scenes":
+                spans = self.processor.analyzer.scene_segments(self.source, self._cancel)
+            else:
+                spans = self.processor.analyzer.sound_segments(self.source, self._cancel)
+            self.finished.emit(spans)
+        except FFmpegCancelled:
+            pass
+        except Exception as e:
+            logger.error(f"AnalysisThread error: {e}", exc_info=True)
+            self.error.emit(str(e))
+    
+    def cancel(self):
+        self._cancel.set()
 
 
 class MainWindow(QMainWindow):
@@ -83,14 +174,29 @@ class MainWindow(QMainWindow):
         download_dir = get_downloads_dir()
         logger.info(f"Download directory: {download_dir}")
         self.downloader = Downloader(download_dir)
+        # Lookups skip expired metadata but never delete it; clear it out once per launch
+        self.downloader.metadata_cache.purge_expired()
+        
+        self.download_signals = DownloadQueueSignals()
+        self.download_queue = DownloadQueue(
+            self.downloader,
+            on_update=self.download_signals.job_updated.emit,
+            on_finished=self.download_signals.job_finished.emit
+        )
         
         self.processor = MediaProcessor()
+        # Entries for files that were deleted or moved are never looked up again
+        self.processor.prober.store.purge_missing()
         self.current_file: Path = None
-        self.download_thread = None
+        # Shared by the timeline and the segment panel, which redraw themselves when it changes
+        self.segments = SegmentStore()
         self.export_thread = None
+        self.timeline_media_thread = None
+        self.analysis_thread = None
         
         self._setup_ui()
         self._connect_signals()
+        self._resume_downloads()
         logger.info("MainWindow: Ready")
     
     def _setup_ui(self):
@@ -116,13 +222,38 @@ class MainWindow(QMainWindow):
         url_layout.setSpacing(10)
         
         self.url_input = QLineEdit()
-        self.url_input.setPlaceholderText("Enter YouTube URL...")
+        self.url_input.setPlaceholderText("Enter YouTube URL(s)...")
+        self.url_input.returnPressed.connect(self._start_download)
         url_layout.addWidget(self.url_input, 1)
         
+        self.ranges_input = QLineEdit()
+        self.ranges_input.setPlaceholderText("Only ranges, e.g. 1:00-1:30")
+        self.ranges_input.setToolTip(
+            "Download only these parts of the video instead of all of it.\n"
+            "Separate ranges with spaces or commas. Leave empty for the whole video."
+        )
+        self.ranges_input.returnPressed.connect(self._start_download)
+        url_layout.addWidget(self.ranges_input)
+        
         self.download_btn = QPushButton("Download")
         self.download_btn.clicked.connect(self._start_download)
         url_layout.addWidget(self.download_btn)
         
+        self.cancel_download_btn = QPushButton("Cancel")
+        self.cancel_download_btn.setObjectName("secondaryBtn")
+        self.cancel_download_btn.setToolTip("Stop all queued and running downloads")
+        self.cancel_download_btn.clicked.connect(self._cancel_downloads)
+        self.cancel_download_btn.hide()
+        url_layout.addWidget(self.cancel_download_btn)
+        
+        self.speed_limit = QSpinBox()
+        self.speed_limit.setRange(0, 1000)
+        self.speed_limit.setSuffix(" MB/s")
+        self.speed_limit.setSpecialValueText("No limit")
+        self.speed_limit.setToolTip("Total download speed shared by all downloads, by priority")
+        self.speed_limit.valueChanged.connect(self._set_speed_limit)
+        url_layout.addWidget(self.speed_limit)
+        
         layout.addLayout(url_layout)
         
         self.progress_bar = QProgressBar()
@@ -144,12 +275,12 @@ class MainWindow(QMainWindow):
         self.player = VideoPlayer()
         editor_layout.addWidget(self.player, 1)
         
-        self.timeline = Timeline()
+        self.timeline = Timeline(self.segments)
         editor_layout.addWidget(self.timeline)
         
         content.addLayout(editor_layout, 1)
         
-        self.segment_panel = SegmentPanel()
+        self.segment_panel = SegmentPanel(self.segments)
         content.addWidget(self.segment_panel)
         
         layout.addLayout(content, 1)
@@ -163,8 +294,21 @@ class MainWindow(QMainWindow):
         export_layout.setSpacing(12)
         
         self.audio_only = QCheckBox("Audio Only (.wav)")
+        self.audio_only.setToolTip("When checked, new downloads fetch only the audio stream")
         export_layout.addWidget(self.audio_only)
         
+        self.smart_cut = QCheckBox("Lossless Cut")
+        self.smart_cut.setChecked(True)
+        self.smart_cut.setToolTip(
+            "Copy the video stream and only re-encode around cut points. "
+            "Falls back to a full re-encode when the source doesn't allow it."
+        )
+        export_layout.addWidget(self.smart_cut)
+        
+        self.join_segments = QCheckBox("Join Into One File")
+        self.join_segments.setToolTip("Export the segments back to back as a single file, in the order they are listed")
+        export_layout.addWidget(self.join_segments)
+        
         export_layout.addStretch()
         
         self.export_btn = QPushButton("Export Segments")
@@ -174,10 +318,14 @@ class MainWindow(QMainWindow):
         layout.addLayout(export_layout)
     
     def _connect_signals(self):
+        self.download_signals.job_updated.connect(self._on_download_progress)
+        self.download_signals.job_finished.connect(self._on_download_finished)
+        
         self.player.position_changed.connect(self.timeline.set_position)
         self.player.duration_changed.connect(self.timeline.set_duration)
         
         self.segment_panel.add_segment.connect(self._add_segment)
+        self.segment_panel.auto_segment.connect(self._auto_segment)
         self.segment_panel.remove_segment.connect(self._remove_segment)
         self.segment_panel.segment_selected.connect(self._on_segment_selected)
         self.segment_panel.name_changed.connect(self._on_name_changed)
@@ -185,47 +333,141 @@ class MainWindow(QMainWindow):
         self.segment_panel.set_end.connect(self._set_segment_end)
         
         self.timeline.segment_selected.connect(self._on_timeline_segment_selected)
-        self.timeline.segment_changed.connect(self._on_segment_bounds_changed)
+    
+    def _resume_downloads(self):
+        resumed = self.download_queue.resume_unfinished()
+        if resumed:
+            self.progress_bar.setValue(0)
+            self.progress_bar.show()
+            self.status_label.setText(f"Resuming {len(resumed)} unfinished download(s)...")
+            self.status_label.show()
     
     def _start_download(self):
-        url = self.url_input.text().strip()
-        if not url:
+        urls = self.url_input.text().split()
+        if not urls:
+            return
+        try:
+            sections = parse_ranges(self.ranges_input.text())
+        except ValueError as e:
+            QMessageBox.warning(self, "Download", str(e))
             return
         
-        self.download_btn.setEnabled(False)
+        self.url_input.clear()
         self.progress_bar.setValue(0)
         self.progress_bar.show()
         self.status_label.show()
-        
-        self.download_thread = DownloadThread(self.downloader, url)
-        self.download_thread.progress.connect(self._on_download_progress)
-        self.download_thread.finished.connect(self._on_download_finished)
-        self.download_thread.error.connect(self._on_download_error)
-        self.download_thread.start()
+        self.download_queue.submit_many(urls, audio_only=self.audio_only.isChecked(), sections=sections)
+    
+    def _set_speed_limit(self, mb_per_second: int):
+        self.download_queue.scheduler.set_limits(mb_per_second * 1024 * 1024 or None)
+    
+    def _cancel_downloads(self):
+        for job in self.download_queue.active_jobs():
+            self.download_queue.cancel(job.id)
+        self.cancel_download_btn.setEnabled(False)
+        self.status_label.setText("Cancelling downloads...")
     
-    def _on_download_progress(self, progress: float, status: str):
+    def _on_download_progress(self, job: DownloadJob):
+        active = self.download_queue.active_jobs()
+        if not active:
+            return
+        self.cancel_download_btn.show()
+        
+        progress = sum(j.progress for j in active) / len(active)
         self.progress_bar.setValue(int(progress * 100))
+        
+        if len(active) == 1:
+            status = active[0].message
+            if active[0].eta:
+                status += f" {self._format_eta(active[0].eta)} left"
+        else:
+            running = sum(1 for j in active if j.status == JobStatus.RUNNING)
+            status = f"Downloading {running} of {len(active)} queued..."
+        speed = self.download_queue.total_speed()
+        if speed > 0:
+            status += f" ({self._format_speed(speed)})"
         self.status_label.setText(status)
     
-    def _on_download_finished(self, file_path: Path):
-        self.download_btn.setEnabled(True)
-        self.progress_bar.hide()
+    def _on_export_progress(self, progress: Progress):
+        self.progress_bar.setValue(int(progress.fraction * 100))
+        status = progress.status
+        details = []
+        if progress.rate > 0 and not progress.finished:
+            # done/total are milliseconds of media, so rate / 1000 is the speed vs realtime
+            details.append(f"{progress.rate / 1000:.1f}x")
+        if progress.eta:
+            details.append(f"{self._format_eta(progress.eta)} left")
+        if details:
+            status += f" ({', '.join(details)})"
+        self.status_label.setText(status)
+    
+    def _on_download_finished(self, job: DownloadJob):
+        # The signal carries the job itself, so the queue needn't keep finished ones around
+        self.download_queue.clear_finished()
+        if not self.download_queue.active_jobs():
+            self.progress_bar.hide()
+            self.cancel_download_btn.hide()
+            self.cancel_download_btn.setEnabled(True)
+        
+        if job.status == JobStatus.CANCELLED:
+            if not self.download_queue.active_jobs():
+                self.status_label.setText("Download cancelled")
+            return
+        if job.status == JobStatus.FAILED:
+            if not self.download_queue.active_jobs():
+                self.status_label.hide()
+            QMessageBox.critical(self, "Download Error", f"{job.url}\n\n{job.error}")
+            return
+        if job.status != JobStatus.FINISHED:
+            return
+        
+        if job.sections:
+            self._on_sections_downloaded(job.result)
+            return
+        
+        file_path = job.result
         self.status_label.setText(f"Downloaded to: {file_path.parent}\\{file_path.name}")
+        # Don't pull the rug out from under segments the user is already editing
+        if self.current_file and len(self.segments):
+            logger.info(f"Download complete, keeping current video loaded: {file_path}")
+            return
         logger.info(f"Download complete, auto-loading video: {file_path}")
         self._load_video(file_path)
     
-    def _on_download_error(self, error: str):
-        self.download_btn.setEnabled(True)
-        self.progress_bar.hide()
-        self.status_label.hide()
-        QMessageBox.critical(self, "Download Error", error)
+    def _on_sections_downloaded(self, sections: list[SectionDownload]):
+        first = sections[0]
+        status = f"Downloaded {len(sections)} range(s) to: {first.path.parent}"
+        if self.current_file and len(self.segments):
+            logger.info(f"Section download complete, keeping current video loaded: {first.path}")
+            self.status_label.setText(status)
+            return
+        # The first range opens with its segments already marked, ready to export
+        logger.info(f"Section download complete, auto-loading: {first.path}")
+        self._load_video(first.path)
+        if self.current_file == first.path:
+            self.segments.extend([(seg.name, seg.start_ms, seg.end_ms) for seg in first.segments])
+            self._select_segment(0)
+        self.status_label.setText(status)
+    
+    def _format_eta(self, seconds: float) -> str:
+        seconds = int(seconds)
+        if seconds >= 3600:
+            return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+        return f"{seconds // 60}:{seconds % 60:02d}"
+    
+    def _format_speed(self, bytes_per_sec: float) -> str:
+        for unit in ("B/s", "KB/s", "MB/s"):
+            if bytes_per_sec < 1024:
+                return f"{bytes_per_sec:.1f} {unit}"
+            bytes_per_sec /= 1024
+        return f"{bytes_per_sec:.1f} GB/s"
     
     def _load_file(self):
         # Start in downloads directory where videos are saved
         start_dir = get_downloads_dir()
         file_path, _ = QFileDialog.getOpenFileName(
             self, "Open Video", str(start_dir),
-            "Video Files (*.mp4 *.mkv *.webm *.avi);;All Files (*)"
+            "Media Files (*.mp4 *.mkv *.webm *.avi *.m4a *.mp3 *.opus *.wav);;All Files (*)"
         )
         if file_path:
             self._load_video(Path(file_path))
@@ -240,8 +482,8 @@ class MainWindow(QMainWindow):
         try:
             self.current_file = file_path
             self.player.load(file_path)
-            self.timeline.clear_segments()
-            self.segment_panel.clear_segments()
+            self.segments.clear()
+            self._load_timeline_media(file_path)
             self.status_label.setText(f"Loaded: {file_path.name}")
             self.status_label.show()
             logger.info(f"Video loaded successfully: {file_path.name}")
@@ -249,6 +491,28 @@ class MainWindow(QMainWindow):
             logger.error(f"Failed to load video: {e}", exc_info=True)
             QMessageBox.critical(self, "Error", f"Failed to load video: {e}")
     
+    def _load_timeline_media(self, file_path: Path):
+        self.timeline.set_waveform(None)
+        self.timeline.set_filmstrip(None)
+        self._stop_timeline_media()
+        self.timeline_media_thread = TimelineMediaThread(self.processor, file_path)
+        self.timeline_media_thread.waveform_ready.connect(self._on_waveform_ready)
+        self.timeline_media_thread.filmstrip_ready.connect(self._on_filmstrip_ready)
+        self.timeline_media_thread.start()
+    
+    def _stop_timeline_media(self):
+        if self.timeline_media_thread and self.timeline_media_thread.isRunning():
+            self.timeline_media_thread.cancel()
+            self.timeline_media_thread.wait()
+    
+    def _on_waveform_ready(self, source: Path, peaks):
+        if source == self.current_file:
+            self.timeline.set_waveform(peaks)
+    
+    def _on_filmstrip_ready(self, source: Path, filmstrip):
+        if source == self.current_file:
+            self.timeline.set_filmstrip(filmstrip)
+    
     def _add_segment(self):
         if not self.current_file:
             return
@@ -256,76 +520,94 @@ class MainWindow(QMainWindow):
         duration = self.player.get_duration()
         position = self.player.get_position()
         
-        segments = self.timeline.get_segments()
-        name = f"Segment {len(segments) + 1}"
+        name = f"Segment {len(self.segments) + 1}"
         
         end = min(position + 10000, duration)
         start = position
         
-        self.timeline.add_segment(name, start, end)
-        self.segment_panel.add_segment_item(name, start, end)
-        self.segment_panel.set_segment_name(name)
+        self._select_segment(self.segments.append(name, start, end))
+    
+    def _auto_segment(self, kind: str):
+        if not self.current_file or (self.analysis_thread and self.analysis_thread.isRunning()):
+            return
+        label = "scene changes" if kind == "scenes" else "silences"
+        self.status_label.setText(f"Looking for {label}...")
+        self.status_label.show()
+        self.segment_panel.auto_btn.setEnabled(False)
+        self.analysis_thread = AnalysisThread(self.processor, self.current_file, kind)
+        self.analysis_thread.finished.connect(self._on_analysis_finished)
+        self.analysis_thread.error.connect(self._on_analysis_error)
+        self.analysis_thread.start()
+    
+    def _on_analysis_finished(self, spans: list):
+        self.segment_panel.auto_btn.setEnabled(True)
+        if self.analysis_thread.source != self.current_file:
+            return
+        count = len(self.segments)
+        self.segments.extend([(f"Segment {count + n + 1}", start, end) for n, (start, end) in enumerate(spans)])
+        if spans:
+            self._select_segment(len(self.segments) - 1)
+        self.status_label.setText(f"Added {len(spans)} segments")
+    
+    def _on_analysis_error(self, error: str):
+        self.segment_panel.auto_btn.setEnabled(True)
+        self.status_label.setText("Automatic segmentation failed")
+        QMessageBox.critical(self, "Auto Segments", error)
     
     def _remove_segment(self, index: int):
-        self.timeline.remove_segment(index)
-        self.segment_panel.remove_segment_item(index)
+        self.segments.remove(index)
+    
+    def _select_segment(self, index: int):
+        self.timeline.select_segment(index)
+        self.segment_panel.select_segment(index)
+        self.segment_panel.set_segment_name(self.segments[index].name)
     
     def _on_segment_selected(self, index: int):
         self.timeline.select_segment(index)
         if index >= 0:
-            name, start, end = self.timeline.get_segment(index)
-            self.segment_panel.set_segment_name(name)
+            self.segment_panel.set_segment_name(self.segments[index].name)
     
     def _on_timeline_segment_selected(self, index: int):
         self.segment_panel.select_segment(index)
         if index >= 0:
-            name, start, end = self.timeline.get_segment(index)
-            self.segment_panel.set_segment_name(name)
+            self.segment_panel.set_segment_name(self.segments[index].name)
     
     def _on_name_changed(self, index: int, name: str):
-        self.timeline.update_segment_name(index, name)
-        _, start, end = self.timeline.get_segment(index)
-        self.segment_panel.update_segment_item(index, name, start, end)
-    
-    def _on_segment_bounds_changed(self, index: int, start: int, end: int):
-        name, _, _ = self.timeline.get_segment(index)
-        self.segment_panel.update_segment_item(index, name, start, end)
+        self.segments.update(index, name=name)
     
     def _set_segment_start(self):
-        segments = self.timeline.get_segments()
-        if not segments:
-            return
-        idx = self.segment_panel.segment_list.currentRow()
-        if idx < 0:
+        idx = self.segment_panel.current_segment()
+        if not 0 <= idx < len(self.segments):
             return
         
         position = self.player.get_position()
-        name, _, end = self.timeline.get_segment(idx)
-        if position < end - 100:
-            self.timeline._segments[idx].start = position
-            self.timeline.update()
-            self.segment_panel.update_segment_item(idx, name, position, end)
+        if position < self.segments[idx].end_ms - 100:
+            self.segments.update(idx, start_ms=position)
     
     def _set_segment_end(self):
-        segments = self.timeline.get_segments()
-        if not segments:
-            return
-        idx = self.segment_panel.segment_list.currentRow()
-        if idx < 0:
+        idx = self.segment_panel.current_segment()
+        if not 0 <= idx < len(self.segments):
             return
         
         position = self.player.get_position()
-        name, start, _ = self.timeline.get_segment(idx)
-        if position > start + 100:
-            self.timeline._segments[idx].end = position
-            self.timeline.update()
-            self.segment_panel.update_segment_item(idx, name, start, position)
+        if position > self.segments[idx].start_ms + 100:
+            self.segments.update(idx, end_ms=position)
     
     def _export_segments(self):
-        segments_data = self.timeline.get_segments()
-        if not segments_data or not self.current_file:
+        if self.export_thread and self.export_thread.isRunning():
+            self.export_thread.cancel()
+            self.export_btn.setEnabled(False)
+            self.status_label.setText("Cancelling export...")
+            return
+        
+        if not len(self.segments) or not self.current_file:
             QMessageBox.warning(self, "Export", "No segments to export.")
             return
+        empty = sorted(self.segments.index().empty())
+        if empty:
+            names = ", ".join(self.segments[i].name for i in empty)
+            QMessageBox.warning(self, "Export", f"These segments end before they start: {names}")
+            return
         
         # Default to Documents/MediaDownloader for easy access
         default_export_dir = get_exports_dir()
@@ -335,27 +617,31 @@ class MainWindow(QMainWindow):
         if not output_dir:
             return
         
-        segments = [
-            Segment(name=s[0], start_ms=s[1], end_ms=s[2]) 
-            for s in segments_data
-        ]
+        segments = self.segments.snapshot()
         
-        self.export_btn.setEnabled(False)
+        self.export_btn.setText("Cancel Export")
         self.progress_bar.setValue(0)
         self.progress_bar.show()
         self.status_label.show()
         
         self.export_thread = ExportThread(
             self.processor, self.current_file, Path(output_dir),
-            segments, self.audio_only.isChecked()
+            segments, self.audio_only.isChecked(),
+            ExportMode.SMART_CUT if self.smart_cut.isChecked() else ExportMode.REENCODE,
+            f"{Path(self.current_file).stem} (joined)" if self.join_segments.isChecked() else None
         )
-        self.export_thread.progress.connect(self._on_download_progress)
+        self.export_thread.progress.connect(self._on_export_progress)
         self.export_thread.finished.connect(self._on_export_finished)
         self.export_thread.error.connect(self._on_export_error)
+        self.export_thread.cancelled.connect(self._on_export_cancelled)
         self.export_thread.start()
     
-    def _on_export_finished(self, outputs: list):
+    def _reset_export_button(self):
+        self.export_btn.setText("Export Segments")
         self.export_btn.setEnabled(True)
+    
+    def _on_export_finished(self, outputs: list):
+        self._reset_export_button()
         self.progress_bar.hide()
         self.status_label.setText(f"Exported {len(outputs)} segment(s)")
         QMessageBox.information(
@@ -364,7 +650,25 @@ class MainWindow(QMainWindow):
         )
     
     def _on_export_error(self, error: str):
-        self.export_btn.setEnabled(True)
+        self._reset_export_button()
         self.progress_bar.hide()
         self.status_label.hide()
         QMessageBox.critical(self, "Export Error", error)
+    
+    def _on_export_cancelled(self, message: str):
+        self._reset_export_button()
+        self.progress_bar.hide()
+        self.status_label.setText(message)
+    
+    def closeEvent(self, event):
+        if self.export_thread and self.export_thread.isRunning():
+            self.export_thread.cancel()
+            self.export_thread.wait()
+        self._stop_timeline_media()
+        if self.analysis_thread and self.analysis_thread.isRunning():
+            self.analysis_thread.cancel()
+            self.analysis_thread.wait()
+        # Running downloads stop at their next progress update and are resumed on the next launch
+        self.download_queue.shutdown(wait=True)
+        self.downloader.close()
+        super().closeEvent(event)
@@ -1,21 +1,146 @@
+from typing import Optional
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
-    QListWidget, QLineEdit, QLabel, QListWidgetItem
+    QListView, QLineEdit, QLabel, QMenu, QStyle, QStyledItemDelegate, QStyleOptionViewItem
 )
-from PyQt6.QtCore import pyqtSignal
+from PyQt6.QtCore import Qt, pyqtSignal, QAbstractListModel, QItemSelectionModel, QModelIndex, QRect, QSize, QTimer
+from PyQt6.QtGui import QColor, QPainter
+from core.segment_store import ChangeKind, SegmentChange, SegmentStore
+
+# Edits (mostly timeline drags, which change a segment on every mouse move)
+# reach the list at most this often
+REFRESH_INTERVAL_MS = 50
+
+
+def format_time(ms: int) -> str:
+    seconds = ms // 1000
+    minutes = seconds // 60
+    secs = seconds % 60
+    return f"{minutes:02d}:{secs:02d}"
+
+
+class SegmentListModel(QAbstractListModel):
+    """
+    Rows of a SegmentStore, read straight from it when the view asks for
+    them, so only visible rows are ever formatted.
+    """
+    
+    def __init__(self, segments: SegmentStore, parent=None):
+        super().__init__(parent)
+        self._segments = segments
+        # The row count the view has been told about; the store changes first
+        # and is reported to the view afterwards
+        self._rows = len(segments)
+        self._dirty: Optional[tuple[int, int]] = None
+        self._refresh = QTimer(self)
+        self._refresh.setSingleShot(True)
+        self._refresh.setInterval(REFRESH_INTERVAL_MS)
+        self._refresh.timeout.connect(self._flush)
+        segments.subscribe(self._on_segments_changed)
+    
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._rows
+    
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._segments):
+            return None
+        seg = self._segments[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return seg.name
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return f"{seg.name}\n{format_time(seg.start_ms)} - {format_time(seg.end_ms)}"
+        return None
+    
+    def _on_segments_changed(self, change: SegmentChange):
+        if change.kind == ChangeKind.CHANGED:
+            if self._dirty:
+                change = SegmentChange(
+                    change.kind, min(self._dirty[0], change.first), max(self._dirty[1], change.last)
+                )
+            self._dirty = (change.first, change.last)
+            if not self._refresh.isActive():
+                self._refresh.start()
+            return
+        self._flush()
+        if change.kind == ChangeKind.INSERTED:
+            self.beginInsertRows(QModelIndex(), change.first, change.last)
+            self._rows = len(self._segments)
+            self.endInsertRows()
+        elif change.kind == ChangeKind.REMOVED:
+            self.beginRemoveRows(QModelIndex(), change.first, change.last)
+            self._rows = len(self._segments)
+            self.endRemoveRows()
+        else:
+            self.beginResetModel()
+            self._rows = len(self._segments)
+            self.endResetModel()
+    
+    def _flush(self):
+        self._refresh.stop()
+        if self._dirty and self._rows:
+            first, last = self._dirty
+            self.dataChanged.emit(self.index(min(first, self._rows - 1)), self.index(min(last, self._rows - 1)))
+        self._dirty = None
+
+
+class SegmentDelegate(QStyledItemDelegate):
+    """Draws a segment as its name over its time range. Every row has the same height."""
+    
+    PADDING = 8
+    
+    def __init__(self, segments: SegmentStore, parent=None):
+        super().__init__(parent)
+        self._segments = segments
+        self._size: Optional[QSize] = None
+    
+    def sizeHint(self, option: QStyleOptionViewItem, index: QModelIndex) -> QSize:
+        if self._size is None:
+            line = option.fontMetrics.height()
+            self._size = QSize(0, 2 * line + 2 * self.PADDING)
+        return self._size
+    
+    def paint(self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex):
+        if index.row() >= len(self._segments):
+            return
+        seg = self._segments[index.row()]
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        opt.text = ""
+        # Just the row background, with the stylesheet's hover and selection colors
+        opt.widget.style().drawControl(QStyle.ControlElement.CE_ItemViewItem, opt, painter, opt.widget)
+        
+        rect = option.rect.adjusted(self.PADDING, self.PADDING, -self.PADDING, -self.PADDING)
+        line = option.fontMetrics.height()
+        painter.save()
+        painter.setPen(option.palette.text().color())
+        name_rect = QRect(rect.left(), rect.top(), rect.width(), line)
+        name = option.fontMetrics.elidedText(seg.name, Qt.TextElideMode.ElideRight, rect.width())
+        painter.drawText(name_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, name)
+        selected = bool(option.state & QStyle.StateFlag.State_Selected)
+        painter.setPen(option.palette.text().color() if selected else QColor("#8a8aaa"))
+        painter.drawText(
+            QRect(rect.left(), rect.top() + line, rect.width(), line),
+            Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+            f"{format_time(seg.start_ms)} - {format_time(seg.end_ms)}"
+        )
+        painter.restore()
 
 
 class SegmentPanel(QWidget):
     add_segment = pyqtSignal()
+    # "silence" or "scenes"
+    auto_segment = pyqtSignal(str)
     remove_segment = pyqtSignal(int)
     segment_selected = pyqtSignal(int)
     name_changed = pyqtSignal(int, str)
     set_start = pyqtSignal()
     set_end = pyqtSignal()
     
-    def __init__(self):
+    def __init__(self, segments: Optional[SegmentStore] = None):
         super().__init__()
         self.setMaximumWidth(280)
+        self._segments = segments if segments is not None else SegmentStore()
+        self._selecting = False
         self._setup_ui()
     
     def _setup_ui(self):
@@ -34,6 +159,15 @@ class SegmentPanel(QWidget):
         self.add_btn.clicked.connect(self.add_segment.emit)
         btn_layout.addWidget(self.add_btn)
         
+        self.auto_btn = QPushButton("Auto")
+        self.auto_btn.setObjectName("secondaryBtn")
+        self.auto_btn.setToolTip("Propose segments from the audio or video")
+        auto_menu = QMenu(self.auto_btn)
+        auto_menu.addAction("Split at Silences", lambda: self.auto_segment.emit("silence"))
+        auto_menu.addAction("Split at Scene Changes", lambda: self.auto_segment.emit("scenes"))
+        self.auto_btn.setMenu(auto_menu)
+        btn_layout.addWidget(self.auto_btn)
+        
         self.remove_btn = QPushButton("Remove")
         self.remove_btn.setObjectName("secondaryBtn")
         self.remove_btn.clicked.connect(self._on_remove)
@@ -41,8 +175,16 @@ class SegmentPanel(QWidget):
         
         layout.addLayout(btn_layout)
         
-        self.segment_list = QListWidget()
-        self.segment_list.currentRowChanged.connect(self._on_selection_changed)
+        self.segment_model = SegmentListModel(self._segments, self)
+        self.segment_model.modelReset.connect(self._on_model_reset)
+        self.segment_model.rowsAboutToBeRemoved.connect(self._on_rows_about_to_be_removed)
+        self.segment_model.rowsRemoved.connect(self._on_rows_removed)
+        self.segment_list = QListView()
+        # Rows are all one height, so the view can lay out and paint only what is visible
+        self.segment_list.setUniformItemSizes(True)
+        self.segment_list.setItemDelegate(SegmentDelegate(self._segments, self.segment_list))
+        self.segment_list.setModel(self.segment_model)
+        self.segment_list.selectionModel().currentRowChanged.connect(self._on_selection_changed)
         layout.addWidget(self.segment_list, 1)
         
         edit_label = QLabel("Segment Name:")
@@ -69,50 +211,48 @@ class SegmentPanel(QWidget):
         
         layout.addLayout(marker_layout)
     
-    def add_segment_item(self, name: str, start_ms: int, end_ms: int):
-        time_str = f"{self._format_time(start_ms)} - {self._format_time(end_ms)}"
-        item = QListWidgetItem(f"{name}\n{time_str}")
-        self.segment_list.addItem(item)
-        self.segment_list.setCurrentRow(self.segment_list.count() - 1)
-    
-    def update_segment_item(self, index: int, name: str, start_ms: int, end_ms: int):
-        if 0 <= index < self.segment_list.count():
-            time_str = f"{self._format_time(start_ms)} - {self._format_time(end_ms)}"
-            self.segment_list.item(index).setText(f"{name}\n{time_str}")
-    
-    def remove_segment_item(self, index: int):
-        if 0 <= index < self.segment_list.count():
-            self.segment_list.takeItem(index)
-    
-    def clear_segments(self):
-        self.segment_list.clear()
-        self.name_edit.clear()
+    def current_segment(self) -> int:
+        return self.segment_list.currentIndex().row()
     
     def select_segment(self, index: int):
-        self.segment_list.blockSignals(True)
-        self.segment_list.setCurrentRow(index)
-        self.segment_list.blockSignals(False)
+        # Selecting from code isn't echoed back as segment_selected
+        self._selecting = True
+        self.segment_list.selectionModel().setCurrentIndex(
+            self.segment_model.index(index), QItemSelectionModel.SelectionFlag.ClearAndSelect
+        )
+        self._selecting = False
     
     def set_segment_name(self, name: str):
         self.name_edit.blockSignals(True)
         self.name_edit.setText(name)
         self.name_edit.blockSignals(False)
     
-    def _on_selection_changed(self, row: int):
+    def _on_selection_changed(self, current: QModelIndex, previous: QModelIndex):
+        if not self._selecting:
+            self.segment_selected.emit(current.row())
+    
+    def _on_model_reset(self):
+        if not len(self._segments):
+            self.name_edit.clear()
+    
+    def _on_rows_about_to_be_removed(self):
+        # The view moves the current row while rows go away and reports it by
+        # its old number, so hold that back and announce the result once
+        self._selecting = True
+    
+    def _on_rows_removed(self):
+        self._selecting = False
+        row = self.current_segment()
+        if row < 0:
+            self.name_edit.clear()
         self.segment_selected.emit(row)
     
     def _on_remove(self):
-        row = self.segment_list.currentRow()
+        row = self.current_segment()
         if row >= 0:
             self.remove_segment.emit(row)
     
     def _on_name_changed(self, text: str):
-        row = self.segment_list.currentRow()
+        row = self.current_segment()
         if row >= 0:
             self.name_changed.emit(row, text)
-    
-    def _format_time(self, ms: int) -> str:
-        seconds = ms // 1000
-        minutes = seconds // 60
-        secs = seconds % 60
-        return f"{minutes:02d}:{secs:02d}"
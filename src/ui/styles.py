@@ -9,7 +9,7 @@ QWidget {
     font-size: 13px;
 }
 
-QLineEdit {
+QLineEdit, QSpinBox {
     background-color: #16213e;
     border: 2px solid #0f3460;
     border-radius: 6px;
@@ -18,7 +18,7 @@ QLineEdit {
     font-size: 14px;
 }
 
-QLineEdit:focus {
+QLineEdit:focus, QSpinBox:focus {
     border-color: #e94560;
 }
 
@@ -85,24 +85,24 @@ QSlider::sub-page:horizontal {
     border-radius: 3px;
 }
 
-QListWidget {
+QListView {
     background-color: #16213e;
     border: 2px solid #0f3460;
     border-radius: 6px;
     padding: 4px;
 }
 
-QListWidget::item {
+QListView::item {
     padding: 8px;
     border-radius: 4px;
     margin: 2px;
 }
 
-QListWidget::item:selected {
+QListView::item:selected {
     background-color: #e94560;
 }
 
-QListWidget::item:hover {
+QListView::item:hover {
     background-color: #0f3460;
 }
 
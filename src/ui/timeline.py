@@ -1,18 +1,13 @@
+from typing import Optional
 from PyQt6.QtWidgets import QWidget
-from PyQt6.QtCore import Qt, pyqtSignal, QRectF
-from PyQt6.QtGui import QPainter, QColor, QPen, QBrush, QFont
-
-
-class Segment:
-    def __init__(self, name: str, start: int, end: int, color: QColor):
-        self.name = name
-        self.start = start
-        self.end = end
-        self.color = color
+from PyQt6.QtCore import Qt, pyqtSignal, QLineF, QRect, QRectF
+from PyQt6.QtGui import QPainter, QColor, QPen, QBrush, QFont, QPixmap
+from core.filmstrip import Filmstrip
+from core.segment_store import ChangeKind, SegmentChange, SegmentStore
+from core.waveform import WaveformPeaks
 
 
 class Timeline(QWidget):
-    segment_changed = pyqtSignal(int, int, int)
     segment_selected = pyqtSignal(int)
     
     COLORS = [
@@ -20,62 +15,77 @@ class Timeline(QWidget):
         QColor("#ff9f43"), QColor("#00cec9"), QColor("#fd79a8"),
     ]
     
-    def __init__(self):
+    def __init__(self, segments: Optional[SegmentStore] = None):
         super().__init__()
         self.setMinimumHeight(80)
         self.setMouseTracking(True)
         
         self._duration = 1000
         self._position = 0
-        self._segments: list[Segment] = []
+        self._segments = segments if segments is not None else SegmentStore()
+        self._segments.subscribe(self._on_segments_changed)
         self._selected_segment = -1
         self._dragging = None
         self._hover_handle = None
+        self._waveform: Optional[WaveformPeaks] = None
+        # Lines for the current width and duration; rebuilt only when either changes
+        self._waveform_lines: list[QLineF] = []
+        self._waveform_key = None
+        self._filmstrip: Optional[Filmstrip] = None
+        # Sprite sheets by number, read from disk the first time a thumbnail on them is drawn
+        self._filmstrip_sheets: dict[int, QPixmap] = {}
+        # Everything but the playhead, drawn once and reused until something in it changes,
+        # so playback only repaints the strip around the playhead
+        self._static_layer: Optional[QPixmap] = None
+        self._segment_font = QFont()
+        self._segment_font.setPointSize(9)
+        self._tick_font = QFont()
+        self._tick_font.setPointSize(8)
     
     def set_duration(self, duration_ms: int):
         self._duration = max(duration_ms, 1)
-        self.update()
+        self._invalidate()
+    
+    def set_waveform(self, peaks: Optional[WaveformPeaks]):
+        self._waveform = peaks
+        self._waveform_key = None
+        self._invalidate()
+    
+    def set_filmstrip(self, filmstrip: Optional[Filmstrip]):
+        self._filmstrip = filmstrip
+        self._filmstrip_sheets.clear()
+        self._invalidate()
     
     def set_position(self, position_ms: int):
+        old_x = self._time_to_pos(self._position)
         self._position = position_ms
-        self.update()
+        new_x = self._time_to_pos(position_ms)
+        if new_x != old_x:
+            self.update(self._playhead_rect(old_x))
+            self.update(self._playhead_rect(new_x))
+    
+    def _playhead_rect(self, x: int) -> QRect:
+        # The 2px line plus antialiasing on either side
+        return QRect(x - 3, 23, 7, 44)
     
-    def add_segment(self, name: str, start: int, end: int) -> int:
-        color = self.COLORS[len(self._segments) % len(self.COLORS)]
-        self._segments.append(Segment(name, start, end, color))
-        self._selected_segment = len(self._segments) - 1
+    def _invalidate(self):
+        self._static_layer = None
         self.update()
-        return self._selected_segment
     
-    def remove_segment(self, index: int):
-        if 0 <= index < len(self._segments):
-            self._segments.pop(index)
+    def _on_segments_changed(self, change: SegmentChange):
+        if change.kind in (ChangeKind.REMOVED, ChangeKind.RESET):
+            self._dragging = None
+            self._hover_handle = None
+            if change.kind == ChangeKind.REMOVED and self._selected_segment > change.last:
+                # Keep the same segment selected as the rows after it move up
+                self._selected_segment -= change.last - change.first + 1
             if self._selected_segment >= len(self._segments):
                 self._selected_segment = len(self._segments) - 1
-            self.update()
-    
-    def get_segment(self, index: int) -> tuple[str, int, int]:
-        if 0 <= index < len(self._segments):
-            seg = self._segments[index]
-            return seg.name, seg.start, seg.end
-        return "", 0, 0
-    
-    def update_segment_name(self, index: int, name: str):
-        if 0 <= index < len(self._segments):
-            self._segments[index].name = name
-            self.update()
-    
-    def get_segments(self) -> list[tuple[str, int, int]]:
-        return [(s.name, s.start, s.end) for s in self._segments]
-    
-    def clear_segments(self):
-        self._segments.clear()
-        self._selected_segment = -1
-        self.update()
+        self._invalidate()
     
     def select_segment(self, index: int):
         self._selected_segment = index
-        self.update()
+        self._invalidate()
     
     def _pos_to_time(self, x: int) -> int:
         margin = 10
@@ -90,31 +100,29 @@ class Timeline(QWidget):
     def _get_handle_at(self, x: int, y: int):
         if y < 30 or y > 60:
             return None
-        for i, seg in enumerate(self._segments):
-            start_x = self._time_to_pos(seg.start)
-            end_x = self._time_to_pos(seg.end)
-            if abs(x - start_x) < 8:
-                return (i, "start")
-            if abs(x - end_x) < 8:
-                return (i, "end")
-        return None
+        # 8px either side of the edge, in ms at the current width
+        tolerance = 8 * self._duration / max(self.width() - 20, 1)
+        return self._segments.index().nearest_edge(self._pos_to_time(x), tolerance)
     
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
+            selected = self._selected_segment
             handle = self._get_handle_at(event.pos().x(), event.pos().y())
             if handle:
                 self._dragging = handle
                 self._selected_segment = handle[0]
                 self.segment_selected.emit(handle[0])
+            elif 30 <= event.pos().y() <= 60:
+                hits = self._segments.index().at(self._pos_to_time(event.pos().x()))
+                if hits:
+                    # Where segments overlap, the first in the list wins
+                    self._selected_segment = min(hits)
+                    self.segment_selected.emit(self._selected_segment)
+            if self._selected_segment != selected:
+                # The highlight is drawn into the cached layer
+                self._invalidate()
             else:
-                for i, seg in enumerate(self._segments):
-                    start_x = self._time_to_pos(seg.start)
-                    end_x = self._time_to_pos(seg.end)
-                    if start_x <= event.pos().x() <= end_x and 30 <= event.pos().y() <= 60:
-                        self._selected_segment = i
-                        self.segment_selected.emit(i)
-                        break
-            self.update()
+                self.update()
     
     def mouseMoveEvent(self, event):
         if self._dragging:
@@ -122,13 +130,10 @@ class Timeline(QWidget):
             time = max(0, min(self._pos_to_time(event.pos().x()), self._duration))
             seg = self._segments[idx]
             
-            if handle == "start" and time < seg.end - 100:
-                seg.start = time
-            elif handle == "end" and time > seg.start + 100:
-                seg.end = time
-            
-            self.segment_changed.emit(idx, seg.start, seg.end)
-            self.update()
+            if handle == "start" and time < seg.end_ms - 100:
+                self._segments.update(idx, start_ms=time)
+            elif handle == "end" and time > seg.start_ms + 100:
+                self._segments.update(idx, end_ms=time)
         else:
             handle = self._get_handle_at(event.pos().x(), event.pos().y())
             if handle != self._hover_handle:
@@ -140,8 +145,30 @@ class Timeline(QWidget):
     def mouseReleaseEvent(self, event):
         self._dragging = None
     
+    def resizeEvent(self, event):
+        self._static_layer = None
+        super().resizeEvent(event)
+    
     def paintEvent(self, event):
+        ratio = self.devicePixelRatioF()
+        if self._static_layer is None or self._static_layer.devicePixelRatio() != ratio:
+            self._static_layer = QPixmap(self.size() * ratio)
+            self._static_layer.setDevicePixelRatio(ratio)
+            layer_painter = QPainter(self._static_layer)
+            self._paint_static(layer_painter)
+            layer_painter.end()
+        
         painter = QPainter(self)
+        rect = QRectF(event.rect())
+        source = QRectF(rect.x() * ratio, rect.y() * ratio, rect.width() * ratio, rect.height() * ratio)
+        painter.drawPixmap(rect, self._static_layer, source)
+        
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        pos_x = self._time_to_pos(self._position)
+        painter.setPen(QPen(QColor("#fff"), 2))
+        painter.drawLine(int(pos_x), 25, int(pos_x), 65)
+    
+    def _paint_static(self, painter: QPainter):
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         
         painter.fillRect(self.rect(), QColor("#16213e"))
@@ -149,36 +176,39 @@ class Timeline(QWidget):
         track_rect = QRectF(10, 30, self.width() - 20, 30)
         painter.fillRect(track_rect, QColor("#0f3460"))
         
+        if self._filmstrip:
+            self._draw_filmstrip(painter, track_rect)
+            # Dim the thumbnails so the waveform and segments stay readable
+            painter.fillRect(track_rect, QColor(15, 52, 96, 150))
+        
+        if self._waveform:
+            painter.setPen(QPen(QColor("#3f6fa8"), 1))
+            painter.drawLines(self._waveform_track_lines(track_rect))
+        
+        painter.setFont(self._segment_font)
         for i, seg in enumerate(self._segments):
-            x1 = self._time_to_pos(seg.start)
-            x2 = self._time_to_pos(seg.end)
+            x1 = self._time_to_pos(seg.start_ms)
+            x2 = self._time_to_pos(seg.end_ms)
             rect = QRectF(x1, 32, x2 - x1, 26)
             
-            color = seg.color
+            color = self.COLORS[self._segments.key(i) % len(self.COLORS)]
             if i == self._selected_segment:
                 painter.setPen(QPen(QColor("#fff"), 2))
             else:
                 painter.setPen(Qt.PenStyle.NoPen)
-                color = QColor(seg.color.red(), seg.color.green(), seg.color.blue(), 180)
+                color = QColor(color.red(), color.green(), color.blue(), 180)
             
             painter.setBrush(QBrush(color))
             painter.drawRoundedRect(rect, 3, 3)
             
-            painter.setPen(QColor("#fff"))
-            font = QFont()
-            font.setPointSize(9)
-            painter.setFont(font)
             text_rect = rect.adjusted(4, 0, -4, 0)
-            painter.drawText(text_rect, Qt.AlignmentFlag.AlignVCenter, seg.name)
-        
-        pos_x = self._time_to_pos(self._position)
-        painter.setPen(QPen(QColor("#fff"), 2))
-        painter.drawLine(int(pos_x), 25, int(pos_x), 65)
+            # No room for even a letter on segments a few pixels wide
+            if text_rect.width() >= 8:
+                painter.setPen(QColor("#fff"))
+                painter.drawText(text_rect, Qt.AlignmentFlag.AlignVCenter, seg.name)
         
         painter.setPen(QColor("#8a8aaa"))
-        font = QFont()
-        font.setPointSize(8)
-        painter.setFont(font)
+        painter.setFont(self._tick_font)
         
         for i in range(5):
             time_ms = int(self._duration * i / 4)
@@ -187,6 +217,42 @@ class Timeline(QWidget):
             painter.drawText(int(x) - 20, 78, 40, 15, Qt.AlignmentFlag.AlignCenter, 
                            self._format_time(time_ms))
     
+    def _draw_filmstrip(self, painter: QPainter, track_rect: QRectF):
+        strip = self._filmstrip
+        slot_width = track_rect.height() * strip.thumb_width / strip.thumb_height
+        x = track_rect.left()
+        while x < track_rect.right():
+            width = min(slot_width, track_rect.right() - x)
+            # Each slot shows the frame at its middle
+            time_ms = self._pos_to_time(int(x + slot_width / 2))
+            sheet, sx, sy = strip.locate(strip.index_at(time_ms))
+            pixmap = self._filmstrip_sheet(sheet)
+            if pixmap is not None:
+                source = QRectF(sx, sy, strip.thumb_width * width / slot_width, strip.thumb_height)
+                painter.drawPixmap(QRectF(x, track_rect.top(), width, track_rect.height()), pixmap, source)
+            x += slot_width
+    
+    def _filmstrip_sheet(self, sheet: int) -> Optional[QPixmap]:
+        if sheet not in self._filmstrip_sheets:
+            pixmap = QPixmap(str(self._filmstrip.sheet_path(sheet)))
+            self._filmstrip_sheets[sheet] = None if pixmap.isNull() else pixmap
+        return self._filmstrip_sheets[sheet]
+    
+    def _waveform_track_lines(self, track_rect: QRectF) -> list[QLineF]:
+        width = int(track_rect.width())
+        key = (width, self._duration)
+        if key != self._waveform_key:
+            columns = self._waveform.columns(0, self._duration, width)
+            mid = track_rect.center().y()
+            half = track_rect.height() / 2 - 1
+            left = track_rect.left()
+            self._waveform_lines = [
+                QLineF(left + x, mid - hi * half, left + x, mid - lo * half + 1)
+                for x, (lo, hi) in enumerate(columns.tolist())
+            ]
+            self._waveform_key = key
+        return self._waveform_lines
+    
     def _format_time(self, ms: int) -> str:
         seconds = ms // 1000
         minutes = seconds // 60